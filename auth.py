@@ -7,13 +7,17 @@ import bcrypt
 import sys
 
 
-DB_FILE = "pokemon.db"
 SESSION_FILE = "session.txt"
 
 # Automatically find the backend directory
-BACKEND_DIR = os.path.join(os.path.dirname(__file__), "backend")
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
 MAIN_PY_PATH = os.path.join(BACKEND_DIR, "main.py")
 
+# 🔹 Import the backend modules the same way main.py does, so both share one copy of them
+sys.path.insert(0, BACKEND_DIR)
+from db import get_connection
+from database import migrate_database
+
 # Function to hash passwords before storing them
 def hash_password(password):
     return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
@@ -24,7 +28,7 @@ def check_password(stored_password, entered_password):
 
 # Function to register a new user
 def register_user(username, password):
-    with sqlite3.connect(DB_FILE) as conn:
+    with get_connection() as conn:
         cursor = conn.cursor()
         try:
             hashed_pw = hash_password(password)
@@ -36,7 +40,7 @@ def register_user(username, password):
 
 # Function to verify user login
 def login_user(username, password):
-    with sqlite3.connect(DB_FILE) as conn:
+    with get_connection() as conn:
         cursor = conn.cursor()
         cursor.execute("SELECT password FROM users WHERE username = ?", (username,))
         user_data = cursor.fetchone()
@@ -100,5 +104,6 @@ def show_auth_window():
 
 # Run the authentication UI
 if __name__ == "__main__":
+    migrate_database()
     show_auth_window()
 
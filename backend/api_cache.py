@@ -0,0 +1,136 @@
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import urlencode
+
+# Cache lives next to this module so it does not depend on the working directory
+CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "api_cache.db")
+MAX_CACHE_BYTES = 64 * 1024 * 1024  # Compressed bytes kept before LRU eviction
+
+
+def cache_key(url, params=None):
+    """Canonical cache key: the URL plus its query params sorted by name."""
+    if not params:
+        return url
+    return f"{url}?{urlencode(sorted((str(k), str(v)) for k, v in params.items()))}"
+
+
+class CacheEntry:
+    """A cached response body plus its freshness information and validators."""
+
+    def __init__(self, key, body, expires_at, etag=None, last_modified=None):
+        self.key = key
+        self.body = body
+        self.expires_at = expires_at
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def validator_headers(self):
+        """Headers for a conditional request that revalidates this entry."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    @property
+    def expired(self):
+        return time.time() >= self.expires_at
+
+
+class ResponseCache:
+    """SQLite-backed HTTP response cache with per-entry TTLs and a byte-size cap.
+
+    Bodies are stored zlib-compressed. When the total stored size goes over
+    `max_bytes`, the least recently used entries are evicted first. Expired
+    entries are kept (until evicted) so they can still be served offline.
+    """
+
+    def __init__(self, path=CACHE_FILE, max_bytes=MAX_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                etag TEXT,
+                last_modified TEXT
+            )
+        ''')
+
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access)")
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def get(self, key):
+        """Returns the `CacheEntry` for `key` (fresh or expired), or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, expires_at, etag, last_modified FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+
+        return CacheEntry(key, zlib.decompress(row[0]), row[1], row[2], row[3])
+
+    def put(self, key, body, ttl, etag=None, last_modified=None):
+        """Stores `body` (bytes) under `key` for `ttl` seconds, evicting old entries if over the size cap."""
+        compressed = zlib.compress(body, 6)
+        now = time.time()
+
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute('''
+                INSERT OR REPLACE INTO responses
+                    (key, body, size, stored_at, expires_at, last_access, etag, last_modified)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (key, compressed, len(compressed), now, now + ttl, now, etag, last_modified))
+            self._total_bytes += len(compressed) - (old[0] if old else 0)
+
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def touch(self, key, ttl):
+        """Marks `key` fresh for another `ttl` seconds without rewriting its body (after a 304)."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET expires_at = ?, last_access = ? WHERE key = ?", (now + ttl, now, key)
+            )
+
+    def _evict(self):
+        """Deletes least recently used entries until the cache is back under `max_bytes`."""
+        target = self.max_bytes * 0.9  # Leave some headroom so we don't evict on every put
+        victims = []
+        freed = 0
+        cursor = self._conn.execute("SELECT key, size FROM responses ORDER BY last_access")
+        for key, size in cursor:
+            if self._total_bytes - freed <= target:
+                break
+            victims.append((key,))
+            freed += size
+        cursor.close()
+
+        self._conn.execute("BEGIN")
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+        self._conn.execute("COMMIT")
+        self._total_bytes -= freed
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._total_bytes = 0
+
+    @property
+    def total_bytes(self):
+        return self._total_bytes
@@ -0,0 +1,112 @@
+import bisect
+import heapq
+import json
+import os
+from fuzzy_search import normalize_name
+
+# Persisted index, rebuilt whenever the catalog mirror changes
+AUTOCOMPLETE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "autocomplete.json")
+PRECOMPUTED_PREFIX_LENGTH = 2  # Prefixes this short have their top-k stored up front
+TOP_K = 8
+
+
+class PrefixIndex:
+    """Compact prefix index over card names, ranked by popularity.
+
+    Every word-start suffix of a normalized name ("dark charizard",
+    "charizard") is kept in one sorted array, so a prefix maps to a
+    contiguous range found by binary search. Top-k answers for very short
+    prefixes, whose ranges are huge, are precomputed.
+    """
+
+    def __init__(self, names, scores, keys, owners, top=None):
+        self.names = names    # Display names
+        self.scores = scores  # Popularity per name
+        self.keys = keys      # Sorted word-start suffixes
+        self.owners = owners  # Name index for each key
+        self.top = top if top is not None else self._precompute()
+
+    @classmethod
+    def build(cls, popularity):
+        """Builds the index from a dict of display name -> popularity."""
+        merged = {}
+        for name, score in popularity.items():
+            key = normalize_name(name)
+            if not key:
+                continue
+            best_name, total = merged.get(key, (name, 0))
+            # Keep the most common spelling as the display name
+            if score > popularity.get(best_name, 0):
+                best_name = name
+            merged[key] = (best_name, total + score)
+
+        names = []
+        scores = []
+        entries = []
+        for key, (name, score) in merged.items():
+            index = len(names)
+            names.append(name)
+            scores.append(score)
+            words = key.split(" ")
+            for start in range(len(words)):
+                entries.append((" ".join(words[start:]), index))
+
+        entries.sort()
+        return cls(names, scores, [key for key, _ in entries], [owner for _, owner in entries])
+
+    def _range(self, prefix):
+        lo = bisect.bisect_left(self.keys, prefix)
+        hi = bisect.bisect_left(self.keys, prefix + "\uffff", lo)
+        return lo, hi
+
+    def _rank(self, lo, hi, k):
+        owners = set(self.owners[lo:hi])
+        return heapq.nlargest(k, owners, key=lambda index: (self.scores[index], -len(self.names[index])))
+
+    def _precompute(self):
+        top = {}
+        alphabet = sorted({key[0] for key in self.keys if key})
+        prefixes = list(alphabet)
+        if PRECOMPUTED_PREFIX_LENGTH >= 2:
+            prefixes += [a + b for a in alphabet for b in alphabet + [" "]]
+        for prefix in prefixes:
+            lo, hi = self._range(prefix)
+            if hi > lo:
+                top[prefix] = self._rank(lo, hi, TOP_K)
+        return top
+
+    def complete(self, prefix, k=TOP_K):
+        """Returns up to `k` names with a word starting with `prefix`, most popular first."""
+        key = normalize_name(prefix)
+        if not key:
+            return []
+        # Only prefixes of word-start letters are precomputed ("ch" from "charizard" is not)
+        if len(key) <= PRECOMPUTED_PREFIX_LENGTH and k <= TOP_K and key in self.top:
+            return [self.names[index] for index in self.top[key][:k]]
+
+        lo, hi = self._range(key)
+        return [self.names[index] for index in self._rank(lo, hi, k)]
+
+    def save(self, path=AUTOCOMPLETE_FILE, signature=None):
+        data = {
+            "signature": signature,
+            "names": self.names,
+            "scores": self.scores,
+            "keys": self.keys,
+            "owners": self.owners,
+            "top": self.top,
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path=AUTOCOMPLETE_FILE, signature=None):
+        """Loads a saved index, or returns None if it is missing or was built from different data."""
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if signature is not None and data.get("signature") != signature:
+            return None
+        return cls(data["names"], data["scores"], data["keys"], data["owners"], data["top"])
@@ -0,0 +1,250 @@
+import json
+import os
+import sqlite3
+import threading
+from db import get_connection
+from fuzzy_search import FuzzyNameIndex
+from autocomplete import PrefixIndex
+
+# Local mirror of the Pokémon TCG catalog, filled by `catalog_sync.py`
+CATALOG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "catalog.db")
+
+_local = threading.local()
+_fts_tokenizer = None  # "trigram", "unicode61", or None when FTS5 is unavailable
+_fuzzy_index = None
+_fuzzy_signature = None
+
+
+def _create_tables(conn):
+    conn.executescript('''
+        CREATE TABLE IF NOT EXISTS catalog_sets (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            series TEXT,
+            release_date TEXT,
+            total INTEGER,
+            updated_at TEXT,
+            synced_updated_at TEXT,
+            synced_at TIMESTAMP  -- When the set's cards (and prices) were last fetched
+        );
+
+        CREATE TABLE IF NOT EXISTS catalog_cards (
+            id TEXT PRIMARY KEY,
+            set_id TEXT NOT NULL,
+            name TEXT NOT NULL,
+            set_name TEXT,
+            number TEXT,
+            rarity TEXT,
+            subtypes TEXT,
+            artist TEXT,
+            market_price REAL,
+            prices TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_catalog_cards_set ON catalog_cards(set_id);
+
+        -- Next page to fetch for a set whose sync was interrupted
+        CREATE TABLE IF NOT EXISTS sync_checkpoints (
+            set_id TEXT PRIMARY KEY,
+            updated_at TEXT,
+            next_page INTEGER NOT NULL
+        );
+    ''')
+
+
+def _create_fts(conn):
+    """Creates the FTS5 index over `catalog_cards` plus the triggers that keep it in sync.
+
+    Uses the trigram tokenizer (SQLite 3.34+) so any substring of 3+ chars
+    matches, falling back to unicode61 on older builds. Returns the
+    tokenizer in use, or None if FTS5 isn't compiled in.
+    """
+    existing = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'catalog_fts'").fetchone()
+    if existing:
+        return "trigram" if "trigram" in existing[0] else "unicode61"
+
+    for tokenizer in ("trigram", "unicode61 remove_diacritics 2"):
+        try:
+            conn.execute(f'''
+                CREATE VIRTUAL TABLE catalog_fts USING fts5(
+                    name, set_name, rarity, subtypes, artist,
+                    content='catalog_cards', content_rowid='rowid', tokenize='{tokenizer}'
+                )
+            ''')
+            break
+        except sqlite3.OperationalError:
+            continue
+    else:
+        return None
+
+    conn.executescript('''
+        CREATE TRIGGER IF NOT EXISTS catalog_cards_fts_insert AFTER INSERT ON catalog_cards BEGIN
+            INSERT INTO catalog_fts (rowid, name, set_name, rarity, subtypes, artist)
+            VALUES (new.rowid, new.name, new.set_name, new.rarity, new.subtypes, new.artist);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS catalog_cards_fts_delete AFTER DELETE ON catalog_cards BEGIN
+            INSERT INTO catalog_fts (catalog_fts, rowid, name, set_name, rarity, subtypes, artist)
+            VALUES ('delete', old.rowid, old.name, old.set_name, old.rarity, old.subtypes, old.artist);
+        END;
+
+        -- Price-only updates leave the index alone
+        CREATE TRIGGER IF NOT EXISTS catalog_cards_fts_update AFTER UPDATE ON catalog_cards
+        WHEN old.name IS NOT new.name OR old.set_name IS NOT new.set_name OR old.rarity IS NOT new.rarity
+          OR old.subtypes IS NOT new.subtypes OR old.artist IS NOT new.artist
+        BEGIN
+            INSERT INTO catalog_fts (catalog_fts, rowid, name, set_name, rarity, subtypes, artist)
+            VALUES ('delete', old.rowid, old.name, old.set_name, old.rarity, old.subtypes, old.artist);
+            INSERT INTO catalog_fts (rowid, name, set_name, rarity, subtypes, artist)
+            VALUES (new.rowid, new.name, new.set_name, new.rarity, new.subtypes, new.artist);
+        END;
+    ''')
+
+    # Index any cards mirrored before the index existed
+    conn.execute("INSERT INTO catalog_fts (catalog_fts) VALUES ('rebuild')")
+    conn.commit()
+    return tokenizer.split()[0]
+
+
+def get_catalog_connection():
+    """Returns this thread's connection to the catalog mirror, creating the tables on first use."""
+    global _fts_tokenizer
+    conn = get_connection(CATALOG_FILE)
+    # A new connection (first use, or after `db.close_connections`) checks the schema again
+    if getattr(_local, "conn", None) is not conn:
+        _create_tables(conn)
+        _fts_tokenizer = _create_fts(conn)
+        _local.conn = conn
+    return conn
+
+
+def is_catalog_ready():
+    """True once every known set has been mirrored at least once."""
+    conn = get_catalog_connection()
+    total, pending = conn.execute('''
+        SELECT COUNT(*), COUNT(*) - COUNT(synced_updated_at) FROM catalog_sets
+    ''').fetchone()
+    return total > 0 and pending == 0
+
+
+def is_catalog_fresh(max_age):
+    """True when every known set has been mirrored within the last `max_age` seconds."""
+    conn = get_catalog_connection()
+    total, fresh = conn.execute('''
+        SELECT COUNT(*), COUNT(CASE WHEN synced_at >= datetime('now', ?) THEN 1 END) FROM catalog_sets
+    ''', (f"-{int(max_age)} seconds",)).fetchone()
+    return total > 0 and fresh == total
+
+
+def card_record(row):
+    """Converts a `catalog_cards` row into the same record `pokemon_api.parse_card` returns."""
+    card_id, name, set_id, set_name, rarity, number, market_price, prices = row
+    return {
+        "id": card_id,
+        "name": name,
+        "set_id": set_id,
+        "set_name": set_name,
+        "rarity": rarity or "Unknown Rarity",
+        "card_number": number or "N/A",
+        "market_price": market_price,
+        "prices": json.loads(prices) if prices else {},
+    }
+
+
+CARD_COLUMNS = "c.id, c.name, c.set_id, c.set_name, c.rarity, c.number, c.market_price, c.prices"
+FTS_COLUMNS = ("name", "set_name", "rarity", "subtypes", "artist")
+
+
+def _fts_phrase(text):
+    return '"' + text.replace('"', '""') + '"'
+
+
+def _like_pattern(text):
+    return "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def search_catalog(name, selected_set="All Sets", rarity=None, columns=("name",), set_ids=None):
+    """Ranked partial, case-insensitive search over the local mirror.
+
+    `name` is matched as a substring of any of `columns` (a subset of
+    `FTS_COLUMNS`). Set and rarity filters are pushed into the full-text
+    query and then checked exactly (by id when the set's `set_ids` are
+    known). Exact name matches rank first, then bm25 relevance. Terms
+    shorter than a trigram, or SQLite builds without the trigram tokenizer,
+    fall back to a LIKE scan.
+    """
+    term = name.strip()
+    filters = []
+    filter_params = []
+    if selected_set != "All Sets" and set_ids:
+        filters.append(f"c.set_id IN ({', '.join('?' * len(set_ids))})")
+        filter_params.extend(set_ids)
+    elif selected_set != "All Sets":
+        filters.append("c.set_name = ?")
+        filter_params.append(selected_set)
+    if rarity:
+        filters.append("c.rarity = ?")
+        filter_params.append(rarity)
+
+    conn = get_catalog_connection()
+    if _fts_tokenizer == "trigram" and len(term) >= 3:
+        match = f"{{{' '.join(columns)}}} : {_fts_phrase(term)}"
+        if selected_set != "All Sets" and len(selected_set) >= 3:
+            match += f" AND set_name : {_fts_phrase(selected_set)}"
+        if rarity and len(rarity) >= 3:
+            match += f" AND rarity : {_fts_phrase(rarity)}"
+
+        sql = f'''
+            SELECT {CARD_COLUMNS} FROM catalog_fts f
+            JOIN catalog_cards c ON c.rowid = f.rowid
+            LEFT JOIN catalog_sets s ON s.id = c.set_id
+            WHERE catalog_fts MATCH ?
+        '''
+        params = [match]
+        order = "(c.name = ? COLLATE NOCASE) DESC, f.rank, s.release_date"
+    else:
+        like = " OR ".join(f"c.{column} LIKE ? ESCAPE '\\'" for column in columns)
+        sql = f'''
+            SELECT {CARD_COLUMNS} FROM catalog_cards c
+            LEFT JOIN catalog_sets s ON s.id = c.set_id
+            WHERE ({like})
+        '''
+        pattern = _like_pattern(term)
+        params = [pattern] * len(columns)
+        order = "(c.name = ? COLLATE NOCASE) DESC, length(c.name), s.release_date"
+
+    for condition in filters:
+        sql += f" AND {condition}"
+    sql += f" ORDER BY {order}, c.set_id, CAST(c.number AS INTEGER), c.number"
+    params += filter_params + [term]
+
+    return [card_record(row) for row in conn.execute(sql, params)]
+
+
+def _catalog_signature(conn):
+    """Changes whenever cards are added to or removed from the mirror."""
+    return conn.execute("SELECT COUNT(*), MAX(rowid) FROM catalog_cards").fetchone()
+
+
+def suggest_card_names(query, limit=5):
+    """Typo-tolerant "did you mean" suggestions from the distinct card names in the mirror."""
+    global _fuzzy_index, _fuzzy_signature
+    conn = get_catalog_connection()
+    signature = _catalog_signature(conn)
+    if _fuzzy_index is None or signature != _fuzzy_signature:
+        names = [row[0] for row in conn.execute("SELECT DISTINCT name FROM catalog_cards")]
+        _fuzzy_index = FuzzyNameIndex(names)
+        _fuzzy_signature = signature
+    return _fuzzy_index.suggest(query, limit)
+
+
+def load_autocomplete_index():
+    """Loads the persisted autocomplete index, rebuilding it first if the mirror has changed."""
+    conn = get_catalog_connection()
+    signature = list(_catalog_signature(conn))
+    index = PrefixIndex.load(signature=signature)
+    if index is None:
+        # Popularity = number of printings of each name
+        popularity = dict(conn.execute("SELECT name, COUNT(*) FROM catalog_cards GROUP BY name"))
+        index = PrefixIndex.build(popularity)
+        index.save(signature=signature)
+    return index
@@ -0,0 +1,117 @@
+import json
+import sys
+import requests
+from pokemon_api import client, BASE_URL, SETS_URL, CARD_FIELDS, CATALOG_TTL, build_select, parse_card
+from catalog import get_catalog_connection
+from rate_limiter import BACKGROUND
+
+SET_SYNC_FIELDS = "id,name,series,releaseDate,total,updatedAt"
+CARD_SYNC_EXTRA_FIELDS = ("subtypes", "artist")
+SETS_TTL = 3600  # Re-check set `updatedAt` values at most hourly
+
+
+def _fetch_sets():
+    params = {"select": SET_SYNC_FIELDS}
+    sets = []
+    for page in client.iter_pages(SETS_URL, params, priority=BACKGROUND, ttl=SETS_TTL):
+        sets.extend(page)
+    return sets
+
+
+def _card_row(raw_card):
+    card = parse_card(raw_card)
+    return (
+        card["id"], card["set_id"], card["name"], card["set_name"], card["card_number"],
+        raw_card.get("rarity"), ", ".join(raw_card.get("subtypes", [])), raw_card.get("artist"),
+        card["market_price"], json.dumps(card["prices"]),
+    )
+
+
+def _sync_set(conn, set_info, start_page):
+    """Mirrors every card of one set, checkpointing after each page so a crash resumes mid-set."""
+    params = {
+        "q": f"set.id:{set_info['id']}",
+        "select": build_select(CARD_FIELDS, CARD_SYNC_EXTRA_FIELDS),
+        "orderBy": "number",
+    }
+    page_number = start_page
+    for page in client.iter_pages(BASE_URL, params, priority=BACKGROUND, allow_stale=False,
+                                  start_page=start_page):
+        with conn:
+            # Upsert (not REPLACE) so the full-text index triggers see an UPDATE, not a silent delete
+            conn.executemany('''
+                INSERT INTO catalog_cards
+                    (id, set_id, name, set_name, number, rarity, subtypes, artist, market_price, prices)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    set_id = excluded.set_id, name = excluded.name, set_name = excluded.set_name,
+                    number = excluded.number, rarity = excluded.rarity, subtypes = excluded.subtypes,
+                    artist = excluded.artist, market_price = excluded.market_price, prices = excluded.prices
+            ''', [_card_row(raw_card) for raw_card in page])
+            page_number += 1
+            conn.execute('''
+                INSERT OR REPLACE INTO sync_checkpoints (set_id, updated_at, next_page) VALUES (?, ?, ?)
+            ''', (set_info["id"], set_info.get("updatedAt"), page_number))
+
+    with conn:
+        conn.execute('''
+            UPDATE catalog_sets SET synced_updated_at = updated_at, synced_at = CURRENT_TIMESTAMP WHERE id = ?
+        ''', (set_info["id"],))
+        conn.execute("DELETE FROM sync_checkpoints WHERE set_id = ?", (set_info["id"],))
+
+
+# Function to mirror the card catalog into the local SQLite database
+def sync_catalog(force=False, progress=None, max_age=CATALOG_TTL):
+    """Brings the local catalog mirror up to date.
+
+    Only sets whose `updatedAt` changed since their last sync, that were
+    interrupted mid-way, or whose prices are older than `max_age` seconds
+    are fetched again, unless `force` is set.
+    `progress(done, total, set_name)` is called after each set. Returns the
+    number of sets synced.
+    """
+    conn = get_catalog_connection()
+    sets = _fetch_sets()
+
+    with conn:
+        conn.executemany('''
+            INSERT INTO catalog_sets (id, name, series, release_date, total, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                name = excluded.name, series = excluded.series, release_date = excluded.release_date,
+                total = excluded.total, updated_at = excluded.updated_at
+        ''', [(s["id"], s["name"], s.get("series"), s.get("releaseDate"), s.get("total"), s.get("updatedAt"))
+              for s in sets])
+
+    synced = {row[0]: row[1] for row in conn.execute("SELECT id, synced_updated_at FROM catalog_sets")}
+    checkpoints = {row[0]: row[1:] for row in conn.execute("SELECT set_id, updated_at, next_page FROM sync_checkpoints")}
+
+    expired = {row[0] for row in conn.execute('''
+        SELECT id FROM catalog_sets WHERE synced_at IS NULL OR synced_at < datetime('now', ?)
+    ''', (f"-{int(max_age)} seconds",))}
+
+    todo = [s for s in sets if force or s["id"] in checkpoints or s["id"] in expired
+            or synced.get(s["id"]) != s.get("updatedAt")]
+    for done, set_info in enumerate(todo, 1):
+        start_page = 1
+        checkpoint = checkpoints.get(set_info["id"])
+        if checkpoint and checkpoint[0] == set_info.get("updatedAt") and not force:
+            start_page = checkpoint[1]
+
+        _sync_set(conn, set_info, start_page)
+        if progress:
+            progress(done, len(todo), set_info["name"])
+
+    return len(todo)
+
+
+def _print_progress(done, total, set_name):
+    print(f"  [{done}/{total}] {set_name}")
+
+
+if __name__ == "__main__":
+    try:
+        count = sync_catalog(force="--force" in sys.argv[1:], progress=_print_progress)
+        print(f"✅ Catalog sync complete, {count} sets updated")
+    except requests.exceptions.RequestException as e:
+        print("⚠ Catalog sync stopped, run again to resume:", e)
@@ -1,30 +1,151 @@
-import sqlite3
-import bcrypt
-
-DB_FILE = "pokemon.db"
-
-def setup_database():
-    with sqlite3.connect(DB_FILE) as conn:
-        cursor = conn.cursor()
-
-        # 🔹 Create `users` table (if it doesn't exist)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                password TEXT NOT NULL
-            )
+from db import DB_FILE, get_connection
+
+# Cards not yet matched to an API id are stored as "local:<old row id>" until backfilled
+LOCAL_CARD_PREFIX = "local:"
+DEFAULT_CONDITION = "Near Mint"
+
+
+# Function to copy the old one-row-per-card `pokemon_cards` table into `cards` + `collection`
+def _migrate_pokemon_cards(cursor):
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'pokemon_cards'")
+    if not cursor.fetchone():
+        return
+
+    cursor.execute("PRAGMA table_info(pokemon_cards)")
+    columns = [col[1] for col in cursor.fetchall()]
+    card_id = f"COALESCE(p.card_id, '{LOCAL_CARD_PREFIX}' || p.id)" if "card_id" in columns \
+        else f"'{LOCAL_CARD_PREFIX}' || p.id"
+
+    # Rows without a matching user were never visible to anyone, so they (and their cards) stay behind
+    if "username" in columns:
+        # `WHERE true` keeps SQLite from reading ON CONFLICT as part of the SELECT
+        cursor.execute(f'''
+            INSERT INTO cards (id, name, set_name, card_number, rarity, market_price, price_updated)
+            SELECT {card_id}, p.name, p.set_name, p.card_number, p.rarity, p.value, p.last_updated
+            FROM pokemon_cards p JOIN users u ON u.username = p.username WHERE true
+            ON CONFLICT(id) DO NOTHING
         ''')
+        cursor.execute(f'''
+            INSERT INTO collection (user_id, card_id, quantity, condition, acquired_at, value)
+            SELECT u.id, {card_id}, COUNT(*), ?, MIN(p.last_updated), MAX(p.value)
+            FROM pokemon_cards p JOIN users u ON u.username = p.username
+            GROUP BY u.id, {card_id}
+            ON CONFLICT(user_id, card_id, condition) DO NOTHING
+        ''', (DEFAULT_CONDITION,))
+
+    cursor.execute("ALTER TABLE pokemon_cards RENAME TO pokemon_cards_migrated")
+    print("✅ Moved saved cards to the per-user collection")
+
+
+# 🔹 Schema migrations, applied in order; the database's `PRAGMA user_version` counts the ones applied.
+# Never edit a released migration, append a new one instead.
+
+def _create_users(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL
+        )
+    ''')
+
+
+def _create_collection(cursor):
+    # One row per distinct card, keyed by Pokémon TCG API id
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS cards (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            set_id TEXT,
+            set_name TEXT,
+            card_number TEXT,
+            rarity TEXT,
+            market_price REAL,
+            price_updated TIMESTAMP
+        )
+    ''')
+
+    # Who owns which card; `value` mirrors `cards.market_price` so lists can sort on an index
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS collection (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            card_id TEXT NOT NULL REFERENCES cards(id),
+            quantity INTEGER NOT NULL DEFAULT 1,
+            condition TEXT NOT NULL DEFAULT '{DEFAULT_CONDITION}',
+            acquired_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            value REAL DEFAULT 0.0,
+            UNIQUE(user_id, card_id, condition)
+        )
+    ''')
+
+    # Covering indexes: a user's list in added order or by value never touches the table
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_collection_user ON collection(user_id, id, card_id, quantity, value)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_collection_user_value ON collection(user_id, value, id, card_id, quantity)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_collection_card ON collection(card_id)")
+
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS cards_price_to_collection AFTER UPDATE OF market_price ON cards
+        BEGIN
+            UPDATE collection SET value = COALESCE(new.market_price, 0.0) WHERE card_id = new.id;
+        END
+    ''')
+
+    _migrate_pokemon_cards(cursor)
+
+
+def _add_backfill_attempted(cursor):
+    # When the id backfill last failed to resolve a `local:` card, so it isn't retried on every launch
+    cursor.execute("ALTER TABLE cards ADD COLUMN backfill_attempted TIMESTAMP")
+
+
+MIGRATIONS = [
+    _create_users,             # 1
+    _create_collection,        # 2
+    _add_backfill_attempted,   # 3
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+# Function to bring the database schema up to date (called by both auth.py and main.py)
+def migrate_database(db_file=DB_FILE):
+    """Applies every migration newer than the database's `user_version`.
+
+    Each migration runs in its own `BEGIN IMMEDIATE` transaction together
+    with its version bump, so a failure leaves the previous version intact
+    and two processes starting at once never apply the same step twice.
+    When the schema is current this is a single PRAGMA read. Returns the
+    schema version.
+    """
+    conn = get_connection(db_file)
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        return version
+
+    while version < SCHEMA_VERSION:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have migrated while we waited for the lock
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version < SCHEMA_VERSION:
+                MIGRATIONS[version](conn.cursor())
+                version += 1
+                conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    print(f"✅ Database schema at version {version}")
+    return version
+
 
-        # 🔹 Add `username` column to `pokemon_cards` (if not already added)
-        cursor.execute("PRAGMA table_info(pokemon_cards)")
-        columns = [col[1] for col in cursor.fetchall()]
-        
-        if "username" not in columns:
-            cursor.execute("ALTER TABLE pokemon_cards ADD COLUMN username TEXT")
+# Function to look up the `users.id` behind a username
+def get_user_id(username):
+    row = get_connection().execute("SELECT id FROM users WHERE username = ?", (username,)).fetchone()
+    return row[0] if row else None
 
-        conn.commit()
-        print("✅ Database setup complete!")
 
-# Run setup
-setup_database()
+# Run migrations
+if __name__ == "__main__":
+    migrate_database()
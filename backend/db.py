@@ -0,0 +1,47 @@
+import os
+import sqlite3
+import threading
+
+# App database at the repository root, wherever the app is launched from
+DB_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "pokemon.db")
+
+BUSY_TIMEOUT = 5.0             # Seconds to wait on a lock held by the other process before failing
+CACHE_SIZE_KB = 16 * 1024      # Page cache per connection
+MMAP_SIZE = 64 * 1024 * 1024   # Bytes of the file read through mmap
+
+_local = threading.local()
+
+
+def _open(path):
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT)
+    conn.execute("PRAGMA journal_mode=WAL")  # Readers never block the writer (auth and main share the file)
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA cache_size=-{CACHE_SIZE_KB}")
+    conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA foreign_keys=ON")
+    return conn
+
+
+def get_connection(path=DB_FILE):
+    """Returns this thread's long-lived connection to `path`, opening and tuning it on first use.
+
+    Use `with conn:` around writes so they commit (or roll back) as one
+    transaction; don't close the connection.
+    """
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+
+    path = os.path.abspath(path)
+    conn = connections.get(path)
+    if conn is None:
+        conn = connections[path] = _open(path)
+    return conn
+
+
+def close_connections():
+    """Closes the calling thread's connections (e.g. before a worker thread exits)."""
+    for conn in getattr(_local, "connections", {}).values():
+        conn.close()
+    _local.connections = {}
@@ -0,0 +1,112 @@
+import re
+import unicodedata
+
+# Gender symbols are spelled out so "nidoran f" finds "Nidoran ♀"
+SYMBOL_WORDS = {"♀": " f ", "♂": " m "}
+MAX_CANDIDATES = 200  # Candidates (by shared trigrams) that get a full edit-distance check
+
+
+def normalize_name(name):
+    """Lowercases `name`, strips accents and symbols and collapses whitespace.
+
+    "Flabébé" -> "flabebe", "Nidoran♀" -> "nidoran f", "Mr. Mime" -> "mr mime".
+    """
+    for symbol, word in SYMBOL_WORDS.items():
+        name = name.replace(symbol, word)
+    name = unicodedata.normalize("NFKD", name)
+    name = "".join(ch for ch in name if not unicodedata.combining(ch))
+    name = re.sub(r"[^a-z0-9]+", " ", name.lower())
+    return name.strip()
+
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def bounded_edit_distance(a, b, limit):
+    """Levenshtein distance between `a` and `b`, or `limit + 1` as soon as it must exceed `limit`."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    if len(a) > len(b):
+        a, b = b, a
+
+    previous = list(range(len(a) + 1))
+    for j, char_b in enumerate(b, 1):
+        current = [j] + [0] * len(a)
+        row_min = j
+        for i, char_a in enumerate(a, 1):
+            current[i] = min(
+                previous[i] + 1,
+                current[i - 1] + 1,
+                previous[i - 1] + (char_a != char_b),
+            )
+            row_min = min(row_min, current[i])
+        if row_min > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class FuzzyNameIndex:
+    """Typo-tolerant lookup over a vocabulary of card names.
+
+    Names are normalized (see `normalize_name`) and indexed by trigram.
+    A query only scores names that share trigrams with it, and only the best
+    `MAX_CANDIDATES` of those get a bounded edit-distance check, so lookups
+    never scan the whole vocabulary.
+    """
+
+    def __init__(self, names):
+        self.names = []        # Display names
+        self.normalized = []   # Normalized form of each name
+        self.postings = {}     # trigram -> list of name indexes
+
+        seen = set()
+        for name in names:
+            key = normalize_name(name)
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            index = len(self.names)
+            self.names.append(name)
+            self.normalized.append(key)
+            for gram in _trigrams(key):
+                self.postings.setdefault(gram, []).append(index)
+
+    def suggest(self, query, limit=5, max_distance=None):
+        """Returns up to `limit` names closest to `query`, best first.
+
+        Names containing the normalized query rank first; the rest are ranked
+        by edit distance, which is allowed to grow with the query length
+        (1 typo for short names, up to 3 for long ones) unless `max_distance`
+        is given.
+        """
+        key = normalize_name(query)
+        if not key:
+            return []
+        if max_distance is None:
+            max_distance = 1 if len(key) <= 4 else 2 if len(key) <= 8 else 3
+
+        shared = {}
+        for gram in _trigrams(key):
+            for index in self.postings.get(gram, ()):
+                shared[index] = shared.get(index, 0) + 1
+        candidates = sorted(shared, key=shared.get, reverse=True)[:MAX_CANDIDATES]
+
+        scored = []
+        for index in candidates:
+            name = self.normalized[index]
+            if key in name:
+                scored.append((0, len(name) - len(key), index))
+                continue
+            # Compare against the same-length prefix too, so "charzard" matches "charizard ex"
+            distance = min(
+                bounded_edit_distance(key, name, max_distance),
+                bounded_edit_distance(key, name[:len(key) + 1], max_distance),
+            )
+            if distance <= max_distance:
+                scored.append((distance, len(name), index))
+
+        scored.sort()
+        return [self.names[index] for _, _, index in scored[:limit]]
@@ -1,14 +1,23 @@
-import sqlite3
 import tkinter as tk
 from tkinter import ttk, messagebox
 import requests
+import threading
+import queue
+import traceback
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from pokemon_api import search_pokemon_cards, get_all_sets
+from pokemon_api import iter_pokemon_cards, get_all_sets, query_cache, PAGE_SIZE, CATALOG_TTL
+from catalog import suggest_card_names, load_autocomplete_index, is_catalog_ready, is_catalog_fresh
+from catalog_sync import sync_catalog
+from database import migrate_database, get_user_id, DEFAULT_CONDITION
+from db import get_connection, close_connections
+from virtual_list import VirtualList, KeysetPager
+from portfolio import backfill_card_ids, revalue_portfolio
 import os
 
-# Database file
-DB_FILE = "pokemon.db"
 SESSION_FILE = "session.txt"  # File to track logged-in user
+LIVE_SEARCH_DELAY = 200  # ms of typing idle time before a live search fires
+LIVE_SEARCH_MIN_LENGTH = 2
 
 # 🔹 Get logged-in user from session file
 if not os.path.exists(SESSION_FILE):
@@ -18,29 +27,38 @@ if not os.path.exists(SESSION_FILE):
 with open(SESSION_FILE, "r") as f:
     current_user = f.read().strip()
 
+# Card records behind the search results listbox, indexed by row
+search_results = []
+
+# "My List" sort orders, each served by a covering index on `collection`: label -> (keys, descending)
+MY_LIST_ORDERS = {
+    "Date added": ((("o.id", "id"),), False),
+    "Value (high to low)": ((("o.value", "value"), ("o.id", "id")), True),
+    "Value (low to high)": ((("o.value", "value"), ("o.id", "id")), False),
+}
+
+# Callbacks from worker threads, run on the Tk main loop by `process_ui_queue`
+ui_queue = queue.Queue()
+
+# Set when the window closes, so background jobs stop instead of keeping the process alive
+app_closing = threading.Event()
+
+# Searches run on this executor; only results tagged with the newest generation are shown
+search_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="search")
+search_generation = 0
+search_running = False
+live_search_job = None  # Pending `root.after` id of the debounced live search
+last_live_search = None
+
+# Prefix index behind the search suggestions (loaded in the background at startup)
+autocomplete_index = None
+
 
 # GitHub Config
 GITHUB_USER = "azulgrizzly"
 REPO_NAME = "poke_value"
 BRANCH = "master"
 
-# Function to create table (if not exists)
-def create_table():
-    with sqlite3.connect(DB_FILE) as conn:
-        cursor = conn.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS pokemon_cards (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                value REAL DEFAULT 0.0,
-                rarity TEXT,
-                set_name TEXT,
-                card_number TEXT,
-                last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        conn.commit()
-
 # Function to fetch GitHub commit history
 def fetch_commit_history():
     """Fetches the latest commits from GitHub and returns a list of commit messages with dates."""
@@ -104,6 +122,7 @@ def update_commit_list():
 
 # Function to search for a Pokémon card using the API
 def search_card():
+    hide_suggestions()
     search_query = search_entry.get().strip()
     selected_set = set_var.get()
 
@@ -111,118 +130,380 @@ def search_card():
         messagebox.showwarning("Input Error", "Please enter a Pokémon name.")
         return
 
-    search_button.config(state=tk.DISABLED, text="Searching...")
-    root.update_idletasks()
+    start_search(search_query, selected_set)
+
+# Function to start a background search, superseding any search still running
+def start_search(search_query, selected_set, live=False):
+    global search_generation, search_running
+    search_generation += 1
+    search_running = True
 
     listbox.delete(0, tk.END)
+    search_results.clear()
+    search_spinner.pack(side=tk.LEFT, padx=5)
+    search_spinner.start(10)
+    search_status.config(text="Searching... (Esc to cancel)")
 
-    results = search_pokemon_cards(search_query, selected_set)
+    search_executor.submit(run_search, search_generation, search_query, selected_set, live)
 
-    search_button.config(state=tk.NORMAL, text="Search")
+# Function run on the search executor; stops fetching pages as soon as the search is superseded
+def run_search(generation, search_query, selected_set, live=False):
+    if generation != search_generation:
+        return  # Superseded while waiting for a free worker
 
-    if not results:
-        messagebox.showinfo("No Results", f"No cards found for '{search_query}' in '{selected_set}'.")
+    batch = []
+    found = 0
+    suggestions = []
+    try:
+        try:
+            # Pages are fetched lazily, so checking before asking for the next card
+            # also stops the next page request once this search is superseded
+            for card in iter_pokemon_cards(search_query, selected_set):
+                if generation != search_generation:
+                    return
+                batch.append(card)
+                found += 1
+                # 🔹 Show the first row right away, then a page at a time
+                if found == 1 or len(batch) == PAGE_SIZE:
+                    call_in_ui(show_search_results, generation, batch)
+                    batch = []
+        except requests.exceptions.RequestException as e:
+            print("⚠ API Request Failed:", e)
+
+        if generation != search_generation:
+            return
+        if batch:
+            call_in_ui(show_search_results, generation, batch)
+
+        # 🔹 Offer the closest card name from the local catalog (typos, accents, ♀/♂)
+        if not found:
+            suggestions = [name for name in suggest_card_names(search_query) if name.lower() != search_query.lower()]
+    except Exception as e:
+        print("⚠ Search failed:", e)
+    finally:
+        # Always queued so the spinner stops; ignored if a newer search has started
+        call_in_ui(finish_search, generation, search_query, selected_set, found, suggestions, live)
+        close_connections()
+
+# Function to append a batch of results, unless a newer search has started
+def show_search_results(generation, cards):
+    if generation != search_generation:
         return
-
-    for card in results:
+    for card in cards:
         display_text = f"{card['name']} - {card['set_name']} (#{card['card_number']}) - {card['rarity']}"
         listbox.insert(tk.END, display_text)
-
-# Function to add a selected card to the database
-# Function to add a selected card to the database
-def add_selected_card():
-    selected_item = listbox.curselection()
-    if not selected_item:
-        messagebox.showwarning("Selection Error", "Please select a card from the search results.")
+    search_results.extend(cards)
+    search_status.config(text=f"Searching... {len(search_results)} cards (Esc to cancel)")
+
+def stop_spinner(status):
+    global search_running
+    search_running = False
+    search_spinner.stop()
+    search_spinner.pack_forget()
+    search_status.config(text=status)
+
+def finish_search(generation, search_query, selected_set, found, suggestions, live=False):
+    if generation != search_generation:
         return
-
-    selected_text = listbox.get(selected_item[0])
-    parts = selected_text.split(" - ")
-    if len(parts) < 3:
+    stop_spinner(f"{found} cards found")
+
+    if not found and live:
+        # 🔹 No dialogs while typing, just a hint in the status line
+        if suggestions:
+            search_status.config(text=f"No cards found, did you mean {suggestions[0]}?")
+    elif not found:
+        if suggestions and messagebox.askyesno(
+            "No Results",
+            f"No cards found for '{search_query}' in '{selected_set}'.\n\n"
+            f"Did you mean: {', '.join(suggestions)}?\n\nSearch for '{suggestions[0]}' instead?"
+        ):
+            search_entry.delete(0, tk.END)
+            search_entry.insert(0, suggestions[0])
+            search_card()
+            return
+        if not suggestions:
+            messagebox.showinfo("No Results", f"No cards found for '{search_query}' in '{selected_set}'.")
+
+# Function to cancel the running search (Esc); rows already shown are kept
+def cancel_search(event=None):
+    global search_generation, last_live_search
+    if not search_running:
         return
+    search_generation += 1
+    last_live_search = None
+    stop_spinner(f"Search cancelled, {len(search_results)} cards shown")
+
+# Function to (re)arm the live search timer after each keystroke or set change
+def schedule_live_search(event=None):
+    global live_search_job
+    if not live_search_var.get():
+        return
+    if live_search_job is not None:
+        root.after_cancel(live_search_job)
+    live_search_job = root.after(LIVE_SEARCH_DELAY, live_search)
+
+# Function to run the live search once typing has paused
+def live_search():
+    global live_search_job, last_live_search, search_generation
+    live_search_job = None
+    search_query = search_entry.get().strip()
+    selected_set = set_var.get()
+    if len(search_query) < LIVE_SEARCH_MIN_LENGTH or (search_query, selected_set) == last_live_search:
+        return
+    last_live_search = (search_query, selected_set)
 
-    card_name = parts[0].strip()
-    set_name = parts[1].split(" (#")[0].strip()
-    card_number = parts[1].split(" (#")[1].split(")")[0].strip()
-    rarity = parts[2].strip()
-
-    # 🔹 Fetch Full Card Data Including Price from API
-    cards_data = search_pokemon_cards(card_name, set_name)
-    selected_card_data = next(
-        (card for card in cards_data if card["set_name"] == set_name and card["card_number"] == card_number),
-        None
-    )
+    # 🔹 Refinements of a recent search are answered from memory, no worker round trip
+    cached = query_cache.get(search_query, selected_set, count_miss=False)
+    if cached is None:
+        start_search(search_query, selected_set, live=True)
+        return
 
-    if not selected_card_data:
-        messagebox.showwarning("Data Error", "Could not retrieve price data for the selected card.")
+    search_generation += 1
+    listbox.delete(0, tk.END)
+    search_results.clear()
+    show_search_results(search_generation, cached)
+    finish_search(search_generation, search_query, selected_set, len(cached), [], live=True)
+
+def toggle_live_search():
+    global last_live_search
+    last_live_search = None
+    schedule_live_search()
+
+# Function to load the autocomplete index without blocking startup
+def load_suggestions():
+    def loaded(index):
+        global autocomplete_index
+        autocomplete_index = index
+
+    start_worker(lambda: call_in_ui(loaded, load_autocomplete_index()))
+
+# Function to refresh the suggestions dropdown on every keystroke
+def update_suggestions(event=None):
+    if event is not None and event.keysym in ("Return", "Escape", "Up", "Down", "Tab"):
         return
 
-    # 🔹 Extract Market Price from API Response
-    market_price = selected_card_data["market_price"] if selected_card_data["market_price"] is not None else 0.0
+    text = search_entry.get().strip()
+    names = autocomplete_index.complete(text) if autocomplete_index and text else []
+    if not names:
+        hide_suggestions()
+        return
 
-    with sqlite3.connect(DB_FILE) as conn:
-        cursor = conn.cursor()
+    suggestion_box.delete(0, tk.END)
+    for name in names:
+        suggestion_box.insert(tk.END, name)
+    suggestion_box.config(height=len(names))
+    suggestion_box.place(in_=search_entry, x=0, rely=1.0, relwidth=1.0)
+    suggestion_box.lift()
+
+def hide_suggestions(event=None):
+    suggestion_box.place_forget()
+
+# Function to move keyboard focus from the entry into the suggestions
+def focus_suggestions(event=None):
+    if suggestion_box.winfo_ismapped():
+        suggestion_box.focus_set()
+        suggestion_box.selection_clear(0, tk.END)
+        suggestion_box.selection_set(0)
+        suggestion_box.activate(0)
+
+# Function to search for the chosen suggestion
+def choose_suggestion(event=None):
+    selection = suggestion_box.curselection()
+    if not selection:
+        return
+    search_entry.delete(0, tk.END)
+    search_entry.insert(0, suggestion_box.get(selection[0]))
+    search_entry.focus_set()
+    search_card()
+
+# Function to fill the set filter without blocking startup (cached list, revalidated in the background)
+def load_sets():
+    def loaded(set_names):
+        set_dropdown.config(values=set_names)
+        if set_var.get() not in set_names:
+            set_var.set("All Sets")
+
+    start_worker(lambda: call_in_ui(loaded, get_all_sets()))
+
+# Function to re-sync sets whose mirrored prices expired; searches use the API until it finishes
+def refresh_catalog():
+    def job():
         try:
-            cursor.execute('''
-                INSERT INTO pokemon_cards (name, set_name, card_number, rarity, value, username)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (card_name, set_name, card_number, rarity, market_price, current_user))
-            conn.commit()
-            messagebox.showinfo("Success", f"Added {card_name} ({set_name} #{card_number}) with price ${market_price:.2f} to My List!")
-            update_listbox()
-        except sqlite3.IntegrityError:
-            messagebox.showwarning("Duplicate", f"{card_name} from {set_name} (#{card_number}) is already in My List!")
+            count = sync_catalog()
+            print(f"✅ Catalog refreshed, {count} sets updated")
+        except requests.exceptions.RequestException as e:
+            print("⚠ Catalog refresh stopped:", e)
 
+    if is_catalog_ready() and not is_catalog_fresh(CATALOG_TTL):
+        start_worker(job)
 
+# Function to add a selected card to the database
+def add_selected_card():
+    selected_item = listbox.curselection()
+    if not selected_item:
+        messagebox.showwarning("Selection Error", "Please select a card from the search results.")
+        return
 
-# Function to update "My List" (Filtered by logged-in user)
-def update_listbox():
-    listbox_my_list.delete(0, tk.END)  # Clear previous entries
+    # 🔹 Use the record kept from the search, no need to ask the API again
+    card = search_results[selected_item[0]]
+    card_name = card["name"]
+    set_name = card["set_name"]
+    card_number = card["card_number"]
+    rarity = card["rarity"]
+    market_price = card["market_price"] if card["market_price"] is not None else 0.0
+
+    with get_connection() as conn:
+        conn.execute('''
+            INSERT INTO cards (id, name, set_id, set_name, card_number, rarity, market_price, price_updated)
+            VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(id) DO UPDATE SET market_price = excluded.market_price, price_updated = excluded.price_updated
+        ''', (card["id"], card_name, card["set_id"], set_name, card_number, rarity, market_price))
+
+        # 🔹 Adding a card you already own bumps its quantity
+        conn.execute('''
+            INSERT INTO collection (user_id, card_id, value) VALUES (?, ?, ?)
+            ON CONFLICT(user_id, card_id, condition) DO UPDATE SET quantity = quantity + 1
+        ''', (current_user_id, card["id"], market_price))
+        quantity = conn.execute('''
+            SELECT quantity FROM collection WHERE user_id = ? AND card_id = ? AND condition = ?
+        ''', (current_user_id, card["id"], DEFAULT_CONDITION)).fetchone()[0]
+
+    owned = f" (you now own {quantity})" if quantity > 1 else ""
+    messagebox.showinfo("Success", f"Added {card_name} ({set_name} #{card_number}) with price ${market_price:.2f} to My List!{owned}")
+    update_listbox(1 if quantity == 1 else 0)
+
+
+
+# Function to build the paged query behind "My List" for the chosen sort order
+def my_list_pager():
+    keys, descending = MY_LIST_ORDERS[my_list_order.get()]
+    return KeysetPager(
+        get_connection,
+        columns="o.id, o.card_id, c.name, c.set_name, c.card_number, c.rarity, o.value, o.quantity",
+        tables="collection o JOIN cards c ON c.id = o.card_id",
+        where="o.user_id = ?",
+        params=[current_user_id],
+        keys=keys,
+        descending=descending,
+        count_tables="collection o",
+    )
 
-    with sqlite3.connect(DB_FILE) as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT name, set_name, card_number, rarity, value FROM pokemon_cards WHERE username = ?", (current_user,))
-        user_cards = cursor.fetchall()
+def format_my_list_row(row):
+    quantity = f" x{row['quantity']}" if row["quantity"] > 1 else ""
+    return f"{row['name']} - {row['set_name']} (#{row['card_number']}) - {row['rarity']} - ${row['value']:.2f}{quantity}"
 
-    if not user_cards:
-        listbox_my_list.insert(tk.END, "No Pokémon found for this user.")
-        return
+# Function to update "My List" (Filtered by logged-in user), only the visible rows are loaded
+def update_listbox(count_change=None):
+    my_list.refresh(count_change)
 
-    for row in user_cards:
-        listbox_my_list.insert(tk.END, f"{row[0]} - {row[1]} (#{row[2]}) - {row[3]} - ${row[4]:.2f}")
+def change_my_list_order(event=None):
+    my_list.set_pager(my_list_pager())
 
-# Function to remove a selected card from "My List"
+# Function to remove the selected cards from "My List"
 def remove_card():
-    selected_item = listbox_my_list.curselection()
-    if not selected_item:
+    rows = my_list.selected_rows()
+    if not rows:
         messagebox.showwarning("Selection Error", "Please select a card to remove.")
         return
 
-    selected_text = listbox_my_list.get(selected_item[0])
-    card_name = selected_text.split(" - ")[0]
+    label = rows[0]["name"] if len(rows) == 1 else f"{len(rows)} cards"
 
-    confirm = messagebox.askyesno("Confirm Deletion", f"Are you sure you want to remove '{card_name}'?")
+    confirm = messagebox.askyesno("Confirm Deletion", f"Are you sure you want to remove '{label}'?")
 
     if confirm:
-        with sqlite3.connect(DB_FILE) as conn:
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM pokemon_cards WHERE name = ?", (card_name,))
-            conn.commit()
-
-        messagebox.showinfo("Removed", f"{card_name} removed from My List!")
-        update_listbox()
-        
+        # 🔹 Delete by primary key, all in one transaction
+        with get_connection() as conn:
+            removed = conn.executemany("DELETE FROM collection WHERE id = ? AND user_id = ?",
+                                       [(row["id"], current_user_id) for row in rows]).rowcount
+            # Cards nobody owns any more no longer need their prices refreshed
+            conn.executemany('''
+                DELETE FROM cards WHERE id = ? AND NOT EXISTS (SELECT 1 FROM collection WHERE card_id = ?)
+            ''', [(row["card_id"], row["card_id"]) for row in rows])
+
+        messagebox.showinfo("Removed", f"{label} removed from My List!")
+        update_listbox(-removed)
+
+# Function to run `target` on a daemon thread that closes its database connections when done
+def start_worker(target):
+    def run():
+        try:
+            target()
+        finally:
+            close_connections()
+
+    threading.Thread(target=run, daemon=True).start()
+
+# Function to run a callback on the Tk main thread (safe to call from worker threads)
+def call_in_ui(callback, *args):
+    ui_queue.put((callback, args))
+
+# Function to drain queued UI callbacks, re-armed with `root.after`
+def process_ui_queue():
+    try:
+        while True:
+            try:
+                callback, args = ui_queue.get_nowait()
+            except queue.Empty:
+                break
+            # 🔹 One failing callback must not stop delivery of the ones after it
+            try:
+                callback(*args)
+            except Exception:
+                print("⚠ UI update failed:")
+                traceback.print_exc()
+    finally:
+        root.after(50, process_ui_queue)
+
+# Function to refresh prices for every owned card in the background
+def refresh_prices():
+    refresh_prices_button.config(state=tk.DISABLED)
+    revalue_status.config(text="Refreshing prices...")
+
+    def show_progress(done, total, eta):
+        revalue_status.config(text=f"Refreshing prices... {done}/{total} cards, ~{eta:.0f}s left")
+
+    def failed(error):
+        refresh_prices_button.config(state=tk.NORMAL)
+        revalue_status.config(text=f"Price refresh failed: {error}")
+
+    def finished(summary):
+        refresh_prices_button.config(state=tk.NORMAL)
+        revalue_status.config(text=f"Updated {summary['updated']} prices for {summary['cards']} cards "
+                                   f"in {summary['elapsed']:.1f}s")
+        update_listbox(0)
+
+    def job():
+        try:
+            summary = revalue_portfolio(progress=lambda *p: call_in_ui(show_progress, *p), cancel=app_closing)
+        except Exception as e:  # e.g. sqlite3.OperationalError; re-enable the button either way
+            print("⚠ Price refresh failed:", e)
+            call_in_ui(failed, e)
+            return
+        call_in_ui(finished, summary)
+
+    start_worker(job)
+
+# Function to stop background work and close the window
+def close_app():
+    global search_generation
+    app_closing.set()
+    # Running searches see they're stale and stop paging; queued ones never start
+    search_generation += 1
+    search_executor.shutdown(wait=False, cancel_futures=True)
+    root.destroy()
+
 # Function to log out (clears session & returns to auth)
 def logout():
     os.remove(SESSION_FILE)
     messagebox.showinfo("Logged Out", "You have been logged out.")
-    root.destroy()
+    close_app()
     os.system("python auth.py")  # Relaunch authentication window
 
 # GUI Setup
 root = tk.Tk()
 root.title("Pokémon Card Manager")
 root.geometry("700x600")
+root.protocol("WM_DELETE_WINDOW", close_app)
 
 notebook = ttk.Notebook(root)
 notebook.pack(expand=True, fill="both")
@@ -237,14 +518,36 @@ search_entry.pack(pady=5)
 
 ttk.Label(search_frame, text="Filter by Set:").pack(pady=5)
 set_var = tk.StringVar(value="All Sets")
-set_dropdown = ttk.Combobox(search_frame, textvariable=set_var, state="readonly")
+set_dropdown = ttk.Combobox(search_frame, textvariable=set_var, values=["All Sets"], state="readonly")
 set_dropdown.pack(pady=5)
 
 search_entry.bind("<Return>", lambda event: search_card())
+search_entry.bind("<KeyRelease>", update_suggestions)
+search_entry.bind("<KeyRelease>", schedule_live_search, add="+")
+set_dropdown.bind("<<ComboboxSelected>>", schedule_live_search)
+search_entry.bind("<Down>", focus_suggestions)
+search_entry.bind("<Escape>", hide_suggestions)
+
+# 🔹 Suggestions dropdown, placed under the search entry while there are matches
+suggestion_box = tk.Listbox(search_frame, height=8, activestyle="dotbox")
+suggestion_box.bind("<Return>", choose_suggestion)
+suggestion_box.bind("<Double-Button-1>", choose_suggestion)
+suggestion_box.bind("<Escape>", lambda event: (hide_suggestions(), search_entry.focus_set()))
 
 search_button = ttk.Button(search_frame, text="Search", command=search_card)
 search_button.pack(pady=5)
 
+live_search_var = tk.BooleanVar(value=False)
+ttk.Checkbutton(search_frame, text="Search as I type", variable=live_search_var,
+                command=toggle_live_search).pack()
+
+# 🔹 Spinner and status line, the spinner only shows while a search is running
+search_status_frame = ttk.Frame(search_frame)
+search_status_frame.pack()
+search_spinner = ttk.Progressbar(search_status_frame, mode="indeterminate", length=80)
+search_status = ttk.Label(search_status_frame, text="")
+search_status.pack(side=tk.RIGHT)
+
 listbox = tk.Listbox(search_frame, width=80, height=10)
 listbox.pack(pady=5)
 
@@ -255,12 +558,25 @@ add_button.pack(pady=5)
 list_frame = ttk.Frame(notebook)
 notebook.add(list_frame, text="My List")
 
-listbox_my_list = tk.Listbox(list_frame, width=80, height=15)
-listbox_my_list.pack(padx=10, pady=10)
+my_list_order = tk.StringVar(value="Date added")
+my_list_sort = ttk.Combobox(list_frame, textvariable=my_list_order, values=list(MY_LIST_ORDERS), state="readonly")
+my_list_sort.bind("<<ComboboxSelected>>", change_my_list_order)
+my_list_sort.pack(pady=(10, 0))
+
+# 🔹 Only the rows on screen are fetched and drawn, however large the collection
+my_list = VirtualList(list_frame, None, format_my_list_row, height=15, width=80,
+                      empty_text="No Pokémon found for this user.")
+my_list.pack(padx=10, pady=10)
 
 remove_button = ttk.Button(list_frame, text="Remove Selected", command=remove_card)
 remove_button.pack(pady=5)
 
+refresh_prices_button = ttk.Button(list_frame, text="Refresh Prices", command=refresh_prices)
+refresh_prices_button.pack(pady=5)
+
+revalue_status = ttk.Label(list_frame, text="")
+revalue_status.pack(pady=5)
+
 # App Updates Tab
 updates_frame = ttk.Frame(notebook)
 notebook.add(updates_frame, text="App Updates")
@@ -276,7 +592,20 @@ refresh_button.pack(pady=5)
 logout_button = ttk.Button(root, text="Logout", command=logout)
 logout_button.pack(pady=10)
 
-create_table()
-update_listbox()
+root.bind("<Escape>", cancel_search)
+
+migrate_database()
+current_user_id = get_user_id(current_user)
+if current_user_id is None:
+    messagebox.showerror("Error", f"User '{current_user}' no longer exists. Please log in again.")
+    exit()
+my_list.set_pager(my_list_pager())
+
+# 🔹 Resolve API ids for cards saved before ids were stored (no-op once done); resolved rows get new ids
+start_worker(lambda: backfill_card_ids() and call_in_ui(update_listbox))
 update_commit_list()
+load_sets()
+load_suggestions()
+refresh_catalog()
+process_ui_queue()
 root.mainloop()
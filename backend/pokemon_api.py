@@ -1,6 +1,16 @@
 import requests
+import json
 import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
+from api_cache import ResponseCache, cache_key
+from rate_limiter import RateLimiter, INTERACTIVE, BACKGROUND
+from catalog import is_catalog_fresh, search_catalog
+from query_cache import QueryCache
 
 # Load API Key from .env file
 load_dotenv()
@@ -10,79 +20,572 @@ API_KEY = os.getenv("POKEMON_TCG_API_KEY")
 BASE_URL = "https://api.pokemontcg.io/v2/cards"
 SETS_URL = "https://api.pokemontcg.io/v2/sets"
 
-def get_all_sets():
-    """Fetches all Pokémon TCG sets from the API, sorts by release date, and returns a list of set names."""
-    headers = {"X-Api-Key": API_KEY}
+# Network settings (seconds)
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 20
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 8.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
 
+# Rate limits for keyed / anonymous access
+RATE_PER_MINUTE = 60 if API_KEY else 30
+DAILY_QUOTA = 20000 if API_KEY else 1000
+INTERACTIVE_WAIT = 10  # Seconds a search waits for a token before falling back to the cache
+
+# Circuit breaker: stop calling the API for a while after repeated failures
+BREAKER_FAILURE_THRESHOLD = 3
+BREAKER_COOLDOWN = 30
+
+# How long cached responses stay fresh, per endpoint (seconds)
+CACHE_TTLS = {
+    SETS_URL: 7 * 24 * 3600,  # Set catalog rarely changes
+    BASE_URL: 12 * 3600,      # Card prices update about daily
+}
+CATALOG_TTL = CACHE_TTLS[BASE_URL]  # Mirrored prices expire like cached card responses
+
+# Largest page the API will return
+PAGE_SIZE = 250
+
+# Id lookups: ids per `id:(a OR b ...)` query, and the longest `q` we send
+ID_CHUNK_SIZE = 100
+MAX_QUERY_LENGTH = 1800
+
+# Fields each call actually reads; only these are requested via `select=`
+CARD_FIELDS = ("id", "name", "set.id", "set.name", "rarity", "number", "tcgplayer.prices")
+SET_FIELDS = ("id", "name", "releaseDate")
+
+
+def build_select(fields, extra_fields=None):
+    """Builds a `select=` value from dotted field paths.
+
+    The API only projects top-level fields, so `set.name` selects `set`.
+    `extra_fields` widens the projection for callers that need more data.
+    """
+    selected = []
+    for field in list(fields) + list(extra_fields or []):
+        top_level = field.split(".", 1)[0]
+        if top_level not in selected:
+            selected.append(top_level)
+    return ",".join(selected)
+
+
+def _retry_after(response):
+    """Returns the Retry-After delay in seconds, or None if the header is missing or not a number."""
+    value = response.headers.get("Retry-After")
     try:
-        response = requests.get(SETS_URL, headers=headers)
-        response.raise_for_status()
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised instead of calling the API while the circuit breaker is open and nothing is cached."""
+
+
+class QuotaExhaustedError(requests.exceptions.RequestException):
+    """Raised when the rate limiter has no daily quota left for the caller's lane,
+    or an interactive call waited longer than `INTERACTIVE_WAIT` for a token."""
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures and stays open for `cooldown` seconds.
+
+    Once the cool-down has passed a single trial call is let through
+    (half-open); its outcome closes the breaker again or restarts the cool-down.
+    """
+
+    def __init__(self, failure_threshold=BREAKER_FAILURE_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.cooldown:
+            return "open"
+        return "half-open"
+
+    def allow(self):
+        """Returns True if a request may be sent now."""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def release_trial(self):
+        """Gives back a half-open trial that never reached the API, so the next call can take it."""
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial_running = False
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution.
+
+    The first caller runs the function; callers arriving while it is still in
+    flight wait and receive the same result (or exception). Results are shared
+    objects, so callers must not mutate them.
+    """
+
+    def __init__(self):
+        self.executed = 0
+        self.shared = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = {"done": threading.Event(), "result": None, "error": None}
+                self._calls[key] = call
+                self.executed += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call["done"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return call["result"]
+
+        try:
+            call["result"] = fn()
+            return call["result"]
+        except BaseException as e:
+            call["error"] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call["done"].set()
+
+    def stats(self):
+        """Calls that hit the network vs. calls that piggybacked on one already in flight."""
+        with self._lock:
+            return {"executed": self.executed, "saved": self.shared}
+
+
+class PokemonTCGClient:
+    """Pooled keep-alive client for the Pokémon TCG API.
+
+    One `requests.Session` is shared by every call so TCP/TLS connections are
+    reused, the API key header is set once, and failed calls are retried with
+    jittered exponential backoff. Successful responses are stored in `cache`
+    (if given) for the endpoint's TTL in `CACHE_TTLS`; expired entries are
+    revalidated with ETag / Last-Modified conditional requests. A circuit
+    breaker stops blocking on the API while it keeps failing, and every
+    request passes through the shared `limiter` in its priority lane.
+    Identical requests in flight at the same time share one network call.
+    """
+
+    def __init__(self, api_key=API_KEY, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT),
+                 max_retries=MAX_RETRIES, pool_size=10, cache=None,
+                 stale_while_revalidate=False, breaker=None, limiter=None):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.cache = cache
+        self.stale_while_revalidate = stale_while_revalidate
+        self.breaker = breaker or CircuitBreaker()
+        self.limiter = limiter or RateLimiter(RATE_PER_MINUTE, daily_quota=DAILY_QUOTA, max_pause=BACKOFF_CAP)
+        self.singleflight = SingleFlight()
+        self._refreshing = set()
+        self._executor = None
+        self.stats = {"hits": 0, "revalidated": 0, "misses": 0, "stale_served": 0}
+        self._stats_lock = threading.Lock()
+
+        self.session = requests.Session()
+        if api_key:
+            self.session.headers["X-Api-Key"] = api_key
+
+        # Retries are handled in `get` so they can honour Retry-After and jitter
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+
+    def _backoff(self, attempt, retry_after=None):
+        """Seconds to sleep before retry number `attempt` (full jitter, capped)."""
+        if retry_after is not None:
+            return min(retry_after, BACKOFF_CAP)
+        return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+    def get(self, url, params=None, timeout=None, ttl=None, allow_stale=None, priority=INTERACTIVE):
+        """GETs `url` and returns the decoded JSON body.
+
+        Fresh cached responses are returned without touching the network. In
+        stale-while-revalidate mode an expired copy is returned immediately
+        while a background thread refreshes it. If the request fails, or the
+        circuit breaker is open, an expired copy is served instead so the app
+        keeps working offline.
+        """
+        ttl = CACHE_TTLS.get(url) if ttl is None else ttl
+        allow_stale = self.stale_while_revalidate if allow_stale is None else allow_stale
+        if self.cache is None or not ttl:
+            if not self.breaker.allow():
+                raise CircuitOpenError(f"API circuit open, skipping request to {url}")
+            return self.singleflight.do(
+                (priority, cache_key(url, params)),
+                lambda: self._fetch(url, params, timeout, priority=priority).json(),
+            )
+
+        key = cache_key(url, params)
+        entry = self.cache.get(key)
+        if entry is not None and not entry.expired:
+            self._count("hits")
+            return json.loads(entry.body)
+
+        if entry is not None and (allow_stale or not self.breaker.allow()):
+            if allow_stale:
+                self._refresh_in_background(key, url, params, timeout, ttl, entry)
+            self._count("stale_served")
+            return json.loads(entry.body)
+
+        if entry is None and not self.breaker.allow():
+            raise CircuitOpenError(f"API circuit open and nothing cached for {url}")
+
+        try:
+            return self.singleflight.do(
+                (priority, key),
+                lambda: self._refresh(key, url, params, timeout, ttl, entry, priority),
+            )
+        except requests.exceptions.RequestException as e:
+            if entry is None:
+                raise
+            print("⚠ API Request Failed, using cached data:", e)
+            self._count("stale_served")
+            return json.loads(entry.body)
+
+    def _refresh(self, key, url, params, timeout, ttl, entry, priority=INTERACTIVE):
+        """Fetches `url` (conditionally, if `entry` has validators) and updates the cache."""
+        headers = entry.validator_headers() if entry is not None else None
+        response = self._fetch(url, params, timeout, headers, priority)
+
+        # 🔹 Not modified: keep the cached body, just extend its lifetime
+        if response.status_code == 304 and entry is not None:
+            self.cache.touch(key, ttl)
+            self._count("revalidated")
+            return json.loads(entry.body)
 
+        self._count("misses")
         data = response.json()
-        if not data["data"]:
+        self.cache.put(key, response.content, ttl,
+                       etag=response.headers.get("ETag"),
+                       last_modified=response.headers.get("Last-Modified"))
+        return data
+
+    def _refresh_in_background(self, key, url, params, timeout, ttl, entry):
+        """Queues a refresh of `key` unless one is already running or the breaker is open."""
+        with self._stats_lock:
+            if key in self._refreshing or not self.breaker.allow():
+                return
+            self._refreshing.add(key)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="api-refresh")
+
+        def run():
+            try:
+                self.singleflight.do(
+                    (BACKGROUND, key),
+                    lambda: self._refresh(key, url, params, timeout, ttl, entry, BACKGROUND),
+                )
+            except requests.exceptions.RequestException as e:
+                print("⚠ Background refresh failed:", e)
+            finally:
+                with self._stats_lock:
+                    self._refreshing.discard(key)
+
+        self._executor.submit(run)
+
+    def _count(self, name):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def cache_stats(self):
+        """Returns a snapshot of the cache hit / revalidate / miss counters."""
+        with self._stats_lock:
+            return dict(self.stats)
+
+    def _fetch(self, url, params=None, timeout=None, headers=None, priority=INTERACTIVE):
+        """Sends the GET request and returns the successful response.
+
+        Connection errors, timeouts and 429/5xx responses are retried up to
+        `max_retries` times and count against the circuit breaker once retries
+        run out; anything else raises a `RequestException`.
+        """
+        try:
+            response = self._send(url, params, timeout, headers, priority)
+        except QuotaExhaustedError:
+            # Nothing was sent, so this says nothing about the API's health
+            self.breaker.release_trial()
+            raise
+        except requests.exceptions.HTTPError as e:
+            if e.response is not None and e.response.status_code in RETRY_STATUSES:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()  # The API answered, it's just a bad request
+            raise
+        except requests.exceptions.RequestException:
+            self.breaker.record_failure()
+            raise
+
+        self.breaker.record_success()
+        return response
+
+    def _send(self, url, params, timeout, headers, priority):
+        # The user is waiting on interactive calls, so they give up and use the cache instead of queueing
+        wait = INTERACTIVE_WAIT if priority == INTERACTIVE else None
+        for attempt in range(self.max_retries + 1):
+            if not self.limiter.acquire(priority, timeout=wait):
+                raise QuotaExhaustedError(f"API rate limit or daily quota reached, skipping request to {url}")
+
+            try:
+                response = self.session.get(url, params=params, headers=headers,
+                                            timeout=timeout or self.timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(self._backoff(attempt))
+                continue
+
+            self.limiter.update_from_headers(response.headers)
+            if response.status_code == 429:
+                self.limiter.record_throttled(_retry_after(response))
+
+            if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                time.sleep(self._backoff(attempt, _retry_after(response)))
+                continue
+
+            response.raise_for_status()
+            return response
+
+    def iter_pages(self, url, params=None, page_size=PAGE_SIZE, priority=INTERACTIVE, allow_stale=None,
+                   ttl=None, start_page=1):
+        """Yields the `data` list of each result page until `totalCount` items have been returned."""
+        params = dict(params or {})
+        params["pageSize"] = page_size
+        page = start_page
+        seen = (start_page - 1) * page_size
+
+        while True:
+            params["page"] = page
+            data = self.get(url, params=params, ttl=ttl, priority=priority, allow_stale=allow_stale)
+            items = data.get("data", [])
+            yield items
+            if not items:
+                return
+
+            seen += len(items)
+            if seen >= data.get("totalCount", seen):
+                return
+            page += 1
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        self.session.close()
+
+
+# Shared client used by every API helper below
+client = PokemonTCGClient(cache=ResponseCache(), stale_while_revalidate=True)
+
+# Set name -> set ids, filled by `get_all_sets`
+set_ids = {}
+
+# Recent complete name-search results, reused for refined queries ("char" -> "chariz")
+query_cache = QueryCache()
+
+def get_all_sets(extra_fields=None, priority=INTERACTIVE):
+    """Fetches all Pokémon TCG sets from the API, sorts by release date, and returns a list of set names.
+
+    Served from the response cache when possible (stale entries are
+    revalidated in the background). Also refreshes `set_ids`, the name ->
+    set id index used by filtered searches.
+    """
+    global set_ids
+    params = {"select": build_select(SET_FIELDS, extra_fields)}
+
+    try:
+        sets = []
+        for page in client.iter_pages(SETS_URL, params, priority=priority):
+            sets.extend(page)
+        if not sets:
             return ["All Sets"]  # Default option if no sets found
 
-        # Extract set names with release dates
-        sets = [{"name": "All Sets", "releaseDate": "0000-00-00"}]  # Default option
-        for set_info in data["data"]:
-            sets.append({
-                "name": set_info["name"],
-                "releaseDate": set_info.get("releaseDate", "9999-99-99")  # Default far future if missing
-            })
+        # Sort sets by release date (oldest to newest), default far future if missing
+        sets.sort(key=lambda set_info: set_info.get("releaseDate", "9999-99-99"))
 
-        # Sort sets by release date (oldest to newest)
-        sorted_sets = sorted(sets, key=lambda x: x["releaseDate"])
+        # A few names are shared by more than one set, so each name maps to every matching id
+        index = {}
+        for set_info in sets:
+            index.setdefault(set_info["name"], []).append(set_info["id"])
+        set_ids = {name: tuple(ids) for name, ids in index.items()}
 
-        # Return only set names in sorted order
-        return [set_item["name"] for set_item in sorted_sets]
+        # Return only set names in sorted order, "All Sets" first
+        return ["All Sets"] + list(index)
 
     except requests.exceptions.RequestException as e:
         print("⚠ API Request Failed:", e)
         return ["All Sets"]  # Default option in case of API failure
 
-def search_pokemon_cards(name, selected_set="All Sets"):
-    """Search for Pokémon cards by name (partial match) and optionally filter by set."""
-    headers = {"X-Api-Key": API_KEY}
+def parse_card(card):
+    """Converts a raw API card document into the record used by the app."""
+    set_info = card.get("set", {})
+    card_info = {
+        "id": card.get("id"),
+        "name": card.get("name", "Unknown"),
+        "set_id": set_info.get("id"),
+        "set_name": set_info.get("name", "Unknown Set"),
+        "rarity": card.get("rarity", "Unknown Rarity"),
+        "card_number": card.get("number", "N/A"),  # Card number in set
+        "market_price": None,
+        "prices": {}  # Market price per variant (normal, holofoil, reverseHolofoil, ...)
+    }
+
+    # Extract Market Price from TCGPlayer data (if available)
+    tcgplayer_data = card.get("tcgplayer", {}).get("prices", {})
+    for variant, variant_prices in tcgplayer_data.items():
+        card_info["prices"][variant] = variant_prices.get("market")
+
+    if "holofoil" in tcgplayer_data:
+        card_info["market_price"] = tcgplayer_data["holofoil"].get("market", 0.0)
+    elif "normal" in tcgplayer_data:
+        card_info["market_price"] = tcgplayer_data["normal"].get("market", 0.0)
+
+    return card_info
 
+def build_card_query(name, selected_set="All Sets"):
+    """Builds the `q` search expression for a partial name match, optionally filtered by set.
+
+    Sets known to `set_ids` are filtered by id, which is exact and indexed;
+    others fall back to matching the set name.
+    """
     # Enable partial matches using wildcards
     query = f'name:"*{name}*"'
-    
+
     if selected_set != "All Sets":
-        query += f' set.name:"{selected_set}"'
-    
-    params = {"q": query}
+        ids = set_ids.get(selected_set)
+        if ids:
+            query += " " + build_or_query("set.id", ids)
+        else:
+            query += f' set.name:"{selected_set}"'
 
-    try:
-        response = requests.get(BASE_URL, headers=headers, params=params)
-        response.raise_for_status()
+    return query
 
-        data = response.json()
-        if not data["data"]:
-            return []  # No results found
-
-        # Extract relevant details
-        cards = []
-        for card in data["data"]:
-            set_name = card.get("set", {}).get("name", "Unknown Set")
-            card_info = {
-                "name": card.get("name", "Unknown"),
-                "set_name": set_name,
-                "rarity": card.get("rarity", "Unknown Rarity"),
-                "card_number": card.get("number", "N/A"),  # Card number in set
-                "market_price": None
-            }
-
-            # Extract Market Price from TCGPlayer data (if available)
-            tcgplayer_data = card.get("tcgplayer", {}).get("prices", {})
-            if "holofoil" in tcgplayer_data:
-                card_info["market_price"] = tcgplayer_data["holofoil"].get("market", 0.0)
-            elif "normal" in tcgplayer_data:
-                card_info["market_price"] = tcgplayer_data["normal"].get("market", 0.0)
+def chunk_or_values(values, chunk_size=ID_CHUNK_SIZE, overhead=0):
+    """Splits `values` into chunks of at most `chunk_size` for `(a OR b OR ...)` queries.
 
-            cards.append(card_info)
+    Chunks are also cut short so that `overhead` plus the OR-joined values
+    never grows past `MAX_QUERY_LENGTH` characters, which keeps the request
+    URL under server limits.
+    """
+    chunks = []
+    chunk = []
+    length = overhead
+    for value in values:
+        extra = len(value) + 4  # " OR " separator
+        if chunk and (len(chunk) >= chunk_size or length + extra > MAX_QUERY_LENGTH):
+            chunks.append(chunk)
+            chunk = []
+            length = overhead
+        chunk.append(value)
+        length += extra
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+def build_or_query(field, values, prefix=""):
+    return f"{prefix}{field}:({' OR '.join(values)})"
 
+def build_or_queries(field, values, chunk_size=ID_CHUNK_SIZE, prefix=""):
+    """Splits `values` into `field:(a OR b OR ...)` queries (see `chunk_or_values`)."""
+    overhead = len(prefix) + len(field) + 3
+    return [build_or_query(field, chunk, prefix) for chunk in chunk_or_values(values, chunk_size, overhead)]
+
+def iter_cards(query, page_size=PAGE_SIZE, extra_fields=None, priority=INTERACTIVE, allow_stale=None):
+    """Yields parsed cards for a raw `q` expression, following `totalCount` until every match is seen.
+
+    Pages are only requested as the caller consumes them, so breaking out of
+    the loop early stops any further network calls. Only `CARD_FIELDS` (plus
+    any `extra_fields`) are downloaded.
+    """
+    params = {"q": query, "select": build_select(CARD_FIELDS, extra_fields)}
+    for page in client.iter_pages(BASE_URL, params, page_size=page_size, priority=priority,
+                                  allow_stale=allow_stale):
+        for card in page:
+            yield parse_card(card)
+
+def iter_pokemon_cards(name, selected_set="All Sets", page_size=PAGE_SIZE, extra_fields=None,
+                       priority=INTERACTIVE, use_catalog=True):
+    """Yields cards matching `name`, optionally filtered by set.
+
+    Answers from `query_cache` when a cached search covers this one, then
+    from the local catalog mirror (no network) while every set was synced
+    within `CATALOG_TTL`, unless `use_catalog` is False; otherwise pages
+    through the API (see `iter_cards`). Complete results are added to
+    `query_cache`.
+    """
+    if extra_fields:
+        return iter_cards(build_card_query(name, selected_set), page_size, extra_fields, priority)
+
+    cached = query_cache.get(name, selected_set)
+    if cached is not None:
+        return iter(cached)
+    if use_catalog and is_catalog_fresh(CATALOG_TTL):
+        cards = search_catalog(name, selected_set, set_ids=set_ids.get(selected_set))
+        query_cache.put(name, selected_set, cards)
+        return iter(cards)
+    return _cache_when_complete(iter_cards(build_card_query(name, selected_set), page_size, None, priority),
+                                name, selected_set)
+
+def _cache_when_complete(cards, name, selected_set):
+    """Passes `cards` through, caching the full list only if the caller reads to the end."""
+    collected = []
+    for card in cards:
+        collected.append(card)
+        yield card
+    query_cache.put(name, selected_set, collected)
+
+def get_set_sizes(priority=INTERACTIVE):
+    """Returns a dict of set id -> number of cards in the set. Raises `RequestException` on failure."""
+    params = {"select": "id,total"}
+    sizes = {}
+    for page in client.iter_pages(SETS_URL, params, priority=priority):
+        for set_info in page:
+            sizes[set_info["id"]] = set_info.get("total", 0)
+    return sizes
+
+def search_pokemon_cards(name, selected_set="All Sets", extra_fields=None, priority=INTERACTIVE,
+                         use_catalog=True):
+    """Search for Pokémon cards by name (partial match) and optionally filter by set."""
+    cards = []
+    try:
+        for card_info in iter_pokemon_cards(name, selected_set, extra_fields=extra_fields,
+                                            priority=priority, use_catalog=use_catalog):
+            cards.append(card_info)
         return cards
 
     except requests.exceptions.RequestException as e:
         print("⚠ API Request Failed:", e)
-        return []
+        return cards  # Whatever pages arrived before the failure
@@ -0,0 +1,186 @@
+import sys
+import time
+import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pokemon_api import iter_cards, build_or_queries, get_set_sizes, ID_CHUNK_SIZE
+from rate_limiter import BACKGROUND
+from request_planner import plan_card_fetch, run_task
+from db import DB_FILE, get_connection, close_connections
+from database import LOCAL_CARD_PREFIX
+
+REVALUE_WORKERS = 4  # Requests in flight at once; the shared rate limiter still paces them
+
+
+# Function to resolve the API id of cards saved before API ids were stored
+def backfill_card_ids(db_file=DB_FILE):
+    """Resolves the API id of every `local:` card migrated from the old schema.
+
+    Cards are grouped by set and looked up with one `set.name:"..." number:(a OR b ...)`
+    query per chunk, then matched on set, number and name. Each resolved
+    card is re-keyed to its API id, merging into any row the same user
+    already has for that id. Cards that were looked up but not found are
+    marked `backfill_attempted` and skipped from then on. Returns the
+    number of cards resolved.
+    """
+    with get_connection(db_file) as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT id, name, set_name, card_number FROM cards WHERE id LIKE ? AND backfill_attempted IS NULL
+        ''', (LOCAL_CARD_PREFIX + "%",))
+        rows = cursor.fetchall()
+
+    if not rows:
+        return 0
+
+    by_set = {}
+    for local_id, name, set_name, card_number in rows:
+        by_set.setdefault(set_name, []).append((local_id, name, card_number))
+
+    resolved = []
+    unresolved = []  # Only cards whose set was fully looked up; a failed request leaves the rest for next time
+    try:
+        for set_name, set_rows in by_set.items():
+            numbers = list(dict.fromkeys(card_number for _, _, card_number in set_rows))
+            found = {}
+            for query in build_or_queries("number", numbers, prefix=f'set.name:"{set_name}" '):
+                for card in iter_cards(query, priority=BACKGROUND):
+                    found[(card["card_number"], card["name"])] = card
+
+            for local_id, name, card_number in set_rows:
+                if (card_number, name) in found:
+                    resolved.append((local_id, found[(card_number, name)]))
+                else:
+                    unresolved.append((local_id,))
+    except requests.exceptions.RequestException as e:
+        print("⚠ Card id backfill stopped early:", e)
+
+    with get_connection(db_file) as conn:
+        for local_id, card in resolved:
+            conn.execute('''
+                INSERT INTO cards (id, name, set_id, set_name, card_number, rarity, market_price, price_updated)
+                VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(id) DO NOTHING
+            ''', (card["id"], card["name"], card["set_id"], card["set_name"], card["card_number"],
+                  card["rarity"], card["market_price"]))
+            conn.execute('''
+                INSERT INTO collection (user_id, card_id, quantity, condition, acquired_at, value)
+                SELECT user_id, ?, quantity, condition, acquired_at, COALESCE(?, value) FROM collection WHERE card_id = ?
+                ON CONFLICT(user_id, card_id, condition) DO UPDATE SET quantity = quantity + excluded.quantity
+            ''', (card["id"], card["market_price"], local_id))
+            conn.execute("DELETE FROM collection WHERE card_id = ?", (local_id,))
+            conn.execute("DELETE FROM cards WHERE id = ?", (local_id,))
+        conn.executemany("UPDATE cards SET backfill_attempted = CURRENT_TIMESTAMP WHERE id = ?", unresolved)
+
+    print(f"✅ Resolved card ids for {len(resolved)} of {len(rows)} cards")
+    return len(resolved)
+
+
+def _revalue_task(db_file, task, cancel=None):
+    """Runs one planned query and writes the prices that changed in a single transaction."""
+    if cancel is not None and cancel.is_set():
+        return 0, 0
+    cards, requests_issued = run_task(task, priority=BACKGROUND, allow_stale=False)
+    if cancel is not None and cancel.is_set():
+        return 0, requests_issued  # Don't write to the database while the app is shutting down
+    updates = [
+        (card["market_price"], card_id, card["market_price"])
+        for card_id, card in cards.items()
+        if card["market_price"] is not None
+    ]
+
+    # A trigger copies the new price to every owner's `collection` row
+    try:
+        with get_connection(db_file) as conn:
+            cursor = conn.executemany('''
+                UPDATE cards SET market_price = ?, price_updated = CURRENT_TIMESTAMP
+                WHERE id = ? AND market_price IS NOT ?
+            ''', updates)
+            conn.commit()
+            return cursor.rowcount, requests_issued
+    finally:
+        close_connections()  # Pool threads exit with the pool, so they don't keep connections open
+
+
+# Function to refresh the value of every owned card
+def revalue_portfolio(db_file=DB_FILE, progress=None, workers=REVALUE_WORKERS, batch_size=ID_CHUNK_SIZE,
+                      cancel=None):
+    """Refreshes the market price of every owned card that has an API id.
+
+    `plan_card_fetch` picks the cheapest mix of whole-set pages and
+    `id:(a OR b ...)` batches, and the planned queries run on a bounded thread
+    pool in the rate limiter's background lane. Only rows whose price changed
+    are written. `progress(done, total, eta_seconds)` is called after each
+    query. Setting the `cancel` event drops every query not yet started and
+    stops after the ones in flight. Returns a summary dict including planned
+    vs executed request counts.
+    """
+    with get_connection(db_file) as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id FROM cards WHERE id NOT LIKE ?", (LOCAL_CARD_PREFIX + "%",))
+        card_ids = [row[0] for row in cursor.fetchall()]
+
+    try:
+        set_sizes = get_set_sizes(priority=BACKGROUND)
+    except requests.exceptions.RequestException as e:
+        print("⚠ Could not load set sizes, fetching by id only:", e)
+        set_sizes = {}
+
+    plan = plan_card_fetch(card_ids, set_sizes, batch_size)
+    total = len(card_ids)
+    done = 0
+    updated = 0
+    executed = 0
+    failed = 0
+    started = time.monotonic()
+    cancelled = False
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="revalue") as pool:
+        futures = {pool.submit(_revalue_task, db_file, task, cancel): task for task in plan["tasks"]}
+        for future in as_completed(futures):
+            if cancel is not None and cancel.is_set():
+                # Queued tasks would otherwise all run before the interpreter can exit
+                pool.shutdown(wait=False, cancel_futures=True)
+                cancelled = True
+                break
+
+            try:
+                rows_changed, requests_issued = future.result()
+                updated += rows_changed
+                executed += requests_issued
+            except requests.exceptions.RequestException as e:
+                failed += 1
+                print("⚠ Revaluation batch failed:", e)
+
+            done += len(futures[future]["card_ids"])
+            if progress:
+                elapsed = time.monotonic() - started
+                eta = elapsed / done * (total - done) if done else None
+                progress(done, total, eta)
+
+    return {
+        "cards": total,
+        "updated": updated,
+        "failed_batches": failed,
+        "planned_requests": plan["planned_requests"],
+        "executed_requests": executed,
+        "id_only_requests": plan["id_only_requests"],
+        "elapsed": time.monotonic() - started,
+        "cancelled": cancelled,
+    }
+
+
+def _print_progress(done, total, eta):
+    print(f"  {done}/{total} cards revalued, ~{eta:.0f}s left")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["backfill"]:
+        backfill_card_ids()
+    elif sys.argv[1:] == ["revalue"]:
+        summary = revalue_portfolio(progress=_print_progress)
+        print(f"✅ Revalued {summary['cards']} cards, {summary['updated']} rows changed "
+              f"in {summary['elapsed']:.1f}s ({summary['failed_batches']} batches failed)")
+        print(f"   Requests: {summary['planned_requests']} planned, {summary['executed_requests']} executed "
+              f"(id-only fetch would need {summary['id_only_requests']})")
+    else:
+        print("Usage: python portfolio.py [backfill | revalue]")
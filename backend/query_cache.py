@@ -0,0 +1,94 @@
+import threading
+import time
+from collections import OrderedDict
+
+ALL_SETS = "All Sets"
+
+
+class QueryCache:
+    """In-memory LRU of complete card search results, with substring subsumption.
+
+    Searches are substring matches on the card name, so the results for
+    "chariz" are exactly the results for "char" (or any other cached
+    substring of it) whose name contains "chariz". A refined query is
+    answered by filtering the smallest cached superset in the same set scope;
+    "All Sets" results also cover every single-set scope.
+    """
+
+    def __init__(self, max_entries=128, max_age=600):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.hits = 0
+        self.subsumed = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # (scope, term) -> (stored_at, results)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _term(name):
+        return name.strip().lower()
+
+    def get(self, name, scope=ALL_SETS, count_miss=True):
+        """Returns cached (or derived) results for a search, or None on a true miss.
+
+        Pass `count_miss=False` for a cache-only probe that is followed by a
+        real search on a miss, so the miss is not counted twice.
+        """
+        term = self._term(name)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get((scope, term))
+            if entry is not None and now - entry[0] < self.max_age:
+                self._entries.move_to_end((scope, term))
+                self.hits += 1
+                return list(entry[1])
+
+            # Smallest fresh superset: the longest cached term contained in this one
+            best = None
+            for (cached_scope, cached_term), (stored_at, results) in self._entries.items():
+                if (cached_term in term and cached_scope in (scope, ALL_SETS)
+                        and now - stored_at < self.max_age
+                        and (best is None or len(results) < len(best[2]))):
+                    best = (cached_scope, stored_at, results)
+
+            if best is None:
+                if count_miss:
+                    self.misses += 1
+                return None
+
+            cached_scope, stored_at, results = best
+            derived = [
+                card for card in results
+                if term in card["name"].lower() and (cached_scope == scope or card["set_name"] == scope)
+            ]
+            self.subsumed += 1
+            self._store((scope, term), stored_at, derived)
+            return list(derived)
+
+    def put(self, name, scope, results):
+        """Caches the complete result list of a search."""
+        with self._lock:
+            self._store((scope, self._term(name)), time.monotonic(), list(results))
+
+    def _store(self, key, stored_at, results):
+        self._entries[key] = (stored_at, results)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Hit counters plus the share of lookups answered by exact hits and by subsumption."""
+        with self._lock:
+            lookups = self.hits + self.subsumed + self.misses
+            return {
+                "hits": self.hits,
+                "subsumed": self.subsumed,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "subsumption_rate": self.subsumed / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,139 @@
+import threading
+import time
+from datetime import date
+
+# Priority lanes (lower value wins)
+INTERACTIVE = 0  # Searches and adds the user is waiting on
+BACKGROUND = 1   # Refresh / sync / revaluation jobs
+
+
+class RateLimiter:
+    """Token bucket shared by every API call, with an interactive and a background lane.
+
+    Tokens refill at `rate_per_minute` up to `burst`. Interactive callers take
+    any available token. Background callers only run while no interactive
+    call is waiting and more than `background_reserve` tokens (and daily
+    quota) are left, so bulk jobs can never starve the UI. A 429 pauses
+    every lane for its Retry-After, at most `max_pause` seconds.
+    """
+
+    def __init__(self, rate_per_minute=60, burst=10, daily_quota=20000, background_reserve=2, max_pause=None):
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.daily_quota = daily_quota
+        self.background_reserve = background_reserve
+        self.max_pause = max_pause
+
+        self.tokens = float(burst)
+        self.used_today = 0
+        self.granted = {INTERACTIVE: 0, BACKGROUND: 0}
+        self.throttled = 0
+        self.reported_limit = None
+        self.reported_remaining = None
+        self._reported_at = 0.0
+
+        self._day = date.today()
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+        self._waiting = {INTERACTIVE: 0, BACKGROUND: 0}
+        self._cond = threading.Condition()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+        if date.today() != self._day:
+            self._day = date.today()
+            self.used_today = 0
+            self.reported_remaining = None
+
+    def quota_remaining(self):
+        """Requests left today, using the API's own count when it has reported one."""
+        remaining = self.daily_quota - self.used_today
+        # Ignore the API's count once it is an hour old, its window may have reset
+        if self.reported_remaining is not None and time.monotonic() - self._reported_at < 3600:
+            remaining = min(remaining, self.reported_remaining)
+        return remaining
+
+    def _can_take(self, priority, now):
+        if now < self._paused_until:
+            return False
+        if priority == INTERACTIVE:
+            return self.tokens >= 1
+        return (self._waiting[INTERACTIVE] == 0
+                and self.tokens >= 1 + self.background_reserve
+                and self.quota_remaining() > self.background_reserve)
+
+    def acquire(self, priority=INTERACTIVE, timeout=None):
+        """Blocks until a request may be sent in `priority`'s lane.
+
+        Returns False if the daily quota is used up for that lane or `timeout`
+        seconds pass first.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with self._cond:
+            self._waiting[priority] += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+
+                    reserve = 0 if priority == INTERACTIVE else self.background_reserve
+                    if self.quota_remaining() <= reserve:
+                        return False
+
+                    if self._can_take(priority, now):
+                        self.tokens -= 1
+                        self.used_today += 1
+                        if self.reported_remaining is not None:
+                            self.reported_remaining -= 1
+                        self.granted[priority] += 1
+                        return True
+
+                    # Sleep until enough tokens refill (or a 429 pause ends), or until woken
+                    needed = (1 + reserve) - self.tokens
+                    wait = max(self._paused_until - now, needed / self.rate, 0.01)
+                    if deadline is not None:
+                        if now >= deadline:
+                            return False
+                        wait = min(wait, deadline - now)
+                    self._cond.wait(wait)
+            finally:
+                self._waiting[priority] -= 1
+                self._cond.notify_all()
+
+    def update_from_headers(self, headers):
+        """Reads `X-RateLimit-Limit` / `X-RateLimit-Remaining` from an API response."""
+        with self._cond:
+            for header, attr in (("X-RateLimit-Limit", "reported_limit"),
+                                 ("X-RateLimit-Remaining", "reported_remaining")):
+                try:
+                    setattr(self, attr, int(headers[header]))
+                except (KeyError, TypeError, ValueError):
+                    continue
+                self._reported_at = time.monotonic()
+
+    def record_throttled(self, retry_after=None):
+        """Empties the bucket and pauses every lane after a 429 response."""
+        with self._cond:
+            self.throttled += 1
+            self.tokens = 0.0
+            pause = retry_after if retry_after is not None else 1.0 / self.rate
+            if self.max_pause is not None:
+                pause = min(pause, self.max_pause)  # A huge Retry-After shouldn't freeze the app
+            self._paused_until = time.monotonic() + pause
+
+    def stats(self):
+        """Snapshot of the quota counters."""
+        with self._cond:
+            return {
+                "interactive_requests": self.granted[INTERACTIVE],
+                "background_requests": self.granted[BACKGROUND],
+                "throttled": self.throttled,
+                "used_today": self.used_today,
+                "daily_quota": self.daily_quota,
+                "quota_remaining": self.quota_remaining(),
+                "reported_limit": self.reported_limit,
+                "tokens": round(self.tokens, 2),
+            }
@@ -0,0 +1,95 @@
+import math
+from pokemon_api import (client, BASE_URL, PAGE_SIZE, ID_CHUNK_SIZE, MAX_QUERY_LENGTH, CARD_FIELDS,
+                         build_select, build_or_query, chunk_or_values, parse_card)
+from rate_limiter import INTERACTIVE
+
+
+def card_set_id(card_id):
+    """API card ids are `<set id>-<number>`, e.g. `swsh4-25` -> `swsh4`."""
+    return card_id.rsplit("-", 1)[0]
+
+
+def _set_pages(set_size, page_size=PAGE_SIZE):
+    return max(1, math.ceil(set_size / page_size))
+
+
+def _id_requests(count, avg_id_length, chunk_size):
+    """Estimated number of `id:(a OR b ...)` queries needed for `count` ids."""
+    if count == 0:
+        return 0
+    per_query = min(chunk_size, max(1, (MAX_QUERY_LENGTH - 6) // (avg_id_length + 4)))
+    return math.ceil(count / per_query)
+
+
+# Function to pick the cheapest set of API queries for a batch of cards
+def plan_card_fetch(card_ids, set_sizes, chunk_size=ID_CHUNK_SIZE):
+    """Plans the fewest requests that fetch every card in `card_ids`.
+
+    Cards are grouped by set. A set is fetched whole (`set.id:xyz`, one
+    request per page) when that beats spending its share of pooled
+    `id:(a OR b ...)` chunks on it. Sets are considered in order of wanted
+    cards per page, and the cut-off with the lowest total estimate wins.
+    `set_sizes` maps set id -> card count (see `get_set_sizes`); sets missing
+    from it are always fetched by id.
+
+    Returns a dict with the `tasks` to run (each a `query`, the `card_ids` it
+    covers and its estimated `requests`), plus `planned_requests` and the
+    `id_only_requests` a plain id-chunked fetch would have needed.
+    """
+    unique_ids = list(dict.fromkeys(card_id for card_id in card_ids if card_id))
+    by_set = {}
+    for card_id in unique_ids:
+        by_set.setdefault(card_set_id(card_id), []).append(card_id)
+
+    avg_id_length = round(sum(map(len, unique_ids)) / len(unique_ids)) if unique_ids else 0
+    id_only = _id_requests(len(unique_ids), avg_id_length, chunk_size)
+
+    # Sets where one page request covers the most wanted cards come first
+    candidates = sorted(
+        (set_id for set_id in by_set if set_id in set_sizes),
+        key=lambda set_id: len(by_set[set_id]) / _set_pages(set_sizes[set_id]),
+        reverse=True,
+    )
+
+    best_cut, best_cost = 0, id_only
+    pages = covered = 0
+    for cut, set_id in enumerate(candidates, 1):
+        pages += _set_pages(set_sizes[set_id])
+        covered += len(by_set[set_id])
+        cost = pages + _id_requests(len(unique_ids) - covered, avg_id_length, chunk_size)
+        if cost < best_cost:
+            best_cut, best_cost = cut, cost
+
+    whole_sets = set(candidates[:best_cut])
+    tasks = [
+        {"query": f"set.id:{set_id}", "card_ids": by_set[set_id], "requests": _set_pages(set_sizes[set_id])}
+        for set_id in candidates[:best_cut]
+    ]
+
+    remaining = [card_id for card_id in unique_ids if card_set_id(card_id) not in whole_sets]
+    for chunk in chunk_or_values(remaining, chunk_size, overhead=len("id:()")):
+        tasks.append({"query": build_or_query("id", chunk), "card_ids": chunk, "requests": 1})
+
+    return {
+        "tasks": tasks,
+        "planned_requests": sum(task["requests"] for task in tasks),
+        "id_only_requests": id_only,
+    }
+
+
+def run_task(task, priority=INTERACTIVE, allow_stale=None):
+    """Runs one planned query. Returns (cards by id for the wanted ids, requests issued)."""
+    params = {"q": task["query"], "select": build_select(CARD_FIELDS)}
+    wanted = set(task["card_ids"])
+    cards = {}
+    requests_issued = 0
+
+    for page in client.iter_pages(BASE_URL, params, priority=priority, allow_stale=allow_stale):
+        requests_issued += 1
+        for raw_card in page:
+            card = parse_card(raw_card)
+            if card["id"] in wanted:
+                cards[card["id"]] = card
+
+    return cards, requests_issued
+
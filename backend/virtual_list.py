@@ -0,0 +1,202 @@
+import tkinter as tk
+from tkinter import ttk
+
+PREFETCH_ROWS = 50  # Rows kept loaded above and below the visible window
+
+
+class KeysetPager:
+    """Reads an ordered query a page at a time by seeking on its sort key.
+
+    `keys` lists the (SQL expression, row field) pairs the rows are ordered
+    by, ending in a unique column; all sort in the same direction. Moving to
+    the next or previous page is a `(key) > (last key)` seek on an index
+    rather than an OFFSET scan. Only arbitrary jumps (dragging the
+    scrollbar) fall back to OFFSET, which still walks the index alone when it
+    covers the query.
+    """
+
+    def __init__(self, connect, columns, tables, where, params, keys, descending=False, count_tables=None):
+        self.connect = connect
+        self.columns = columns
+        self.tables = tables
+        self.where = where
+        self.params = list(params)
+        self.keys = keys
+        self.descending = descending
+        self.count_tables = count_tables or tables
+
+    def _select(self, condition, params, descending, limit, offset=0):
+        key_list = ", ".join(expression for expression, _ in self.keys)
+        direction = "DESC" if descending else "ASC"
+        order = ", ".join(f"{expression} {direction}" for expression, _ in self.keys)
+        sql = f"SELECT {self.columns} FROM {self.tables} WHERE {self.where}"
+        if condition:
+            sql += f" AND ({key_list}) {condition} ({', '.join('?' * len(self.keys))})"
+        sql += f" ORDER BY {order} LIMIT ? OFFSET ?"
+
+        cursor = self.connect().execute(sql, self.params + list(params) + [limit, offset])
+        names = [col[0] for col in cursor.description]
+        return [dict(zip(names, row)) for row in cursor]
+
+    def _key(self, row):
+        return [row[field] for _, field in self.keys]
+
+    def count(self):
+        sql = f"SELECT COUNT(*) FROM {self.count_tables} WHERE {self.where}"
+        return self.connect().execute(sql, self.params).fetchone()[0]
+
+    def at(self, offset, limit):
+        return self._select(None, [], self.descending, limit, offset)
+
+    def after(self, row, limit):
+        """Up to `limit` rows following `row` in sort order."""
+        return self._select("<" if self.descending else ">", self._key(row), self.descending, limit)
+
+    def before(self, row, limit):
+        """Up to `limit` rows preceding `row`, in sort order."""
+        rows = self._select(">" if self.descending else "<", self._key(row), not self.descending, limit)
+        rows.reverse()
+        return rows
+
+
+class VirtualList(ttk.Frame):
+    """Listbox that only ever holds the rows on screen.
+
+    Rows come from a `KeysetPager` into a small buffer (the visible window
+    plus `PREFETCH_ROWS` on each side), so memory and redraw cost depend on
+    the window height, not the collection size. Selections are tracked by
+    `id_field` so they survive scrolling.
+    """
+
+    def __init__(self, parent, pager, format_row, height=15, width=80, id_field="id", empty_text=""):
+        super().__init__(parent)
+        self.pager = pager
+        self.format_row = format_row
+        self.height = height
+        self.id_field = id_field
+        self.empty_text = empty_text
+
+        self.total = None     # Row count, recounted only when the caller can't say how it changed
+        self.top = 0          # Index of the first visible row
+        self._rows = []       # Buffered rows
+        self._start = 0       # Index of `_rows[0]`
+        self._selected = {}   # id -> row, for every selected row, visible or not
+
+        self.listbox = tk.Listbox(self, width=width, height=height, selectmode=tk.EXTENDED, activestyle="none")
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.listbox.bind("<<ListboxSelect>>", self._on_select)
+        # A plain click starts a new selection, so rows selected off screen are dropped too
+        self.listbox.bind("<Button-1>", lambda event: self._selected.clear())
+        self.listbox.bind("<Control-Button-1>", lambda event: None)
+        self.listbox.bind("<Shift-Button-1>", lambda event: None)
+        self.listbox.bind("<MouseWheel>", lambda event: self.scroll(-1 if event.delta > 0 else 1) or "break")
+        self.listbox.bind("<Button-4>", lambda event: self.scroll(-1) or "break")
+        self.listbox.bind("<Button-5>", lambda event: self.scroll(1) or "break")
+        self.listbox.bind("<Up>", lambda event: self._step(-1))
+        self.listbox.bind("<Down>", lambda event: self._step(1))
+        self.listbox.bind("<Prior>", lambda event: self.scroll(-self.height) or "break")
+        self.listbox.bind("<Next>", lambda event: self.scroll(self.height) or "break")
+
+    def set_pager(self, pager):
+        """Switches to a different ordering of the same rows and returns to the top.
+
+        The row count doesn't depend on the order, so it is kept rather than
+        recounted (only the first pager is counted).
+        """
+        self.pager = pager
+        self.top = 0
+        self.refresh(0 if self.total is not None else None)
+
+    def refresh(self, count_change=None):
+        """Reloads the rows around the current position, e.g. after rows were added or removed.
+
+        Pass the number of rows added (or removed, negative) as `count_change`
+        to skip the COUNT(*) query; leave it None when it isn't known.
+        """
+        if count_change is None or self.total is None:
+            self.total = self.pager.count()
+        else:
+            self.total = max(0, self.total + count_change)
+        self._rows = []
+        self._selected = {}
+        self.scroll_to(self.top)
+
+    def selected_rows(self):
+        return list(self._selected.values())
+
+    def scroll(self, delta):
+        self.scroll_to(self.top + delta)
+
+    def scroll_to(self, top):
+        self.top = max(0, min(top, self.total - self.height))
+        self._load(self.top)
+        self._render()
+
+    def _load(self, top):
+        """Makes sure rows `top` .. `top + height` are buffered, seeking from the buffer edges when possible."""
+        lo, hi = top, min(top + self.height, self.total)
+        start, end = self._start, self._start + len(self._rows)
+        if start <= lo and hi <= end:
+            return
+
+        window = self.height + 2 * PREFETCH_ROWS
+        if self._rows and start <= lo <= end < hi:
+            self._rows += self.pager.after(self._rows[-1], hi - end + PREFETCH_ROWS)
+        elif self._rows and lo < start <= hi:
+            rows = self.pager.before(self._rows[0], start - lo + PREFETCH_ROWS)
+            self._rows = rows + self._rows
+            self._start -= len(rows)
+        else:
+            self._start = max(0, lo - PREFETCH_ROWS)
+            self._rows = self.pager.at(self._start, window)
+
+        # Keep the buffer bounded around the visible window
+        drop = max(0, lo - PREFETCH_ROWS - self._start)
+        if drop:
+            self._rows = self._rows[drop:]
+            self._start += drop
+        del self._rows[window:]
+
+    def _visible(self):
+        offset = self.top - self._start
+        return self._rows[offset:offset + self.height]
+
+    def _render(self):
+        self.listbox.delete(0, tk.END)
+        if not self.total:
+            self.listbox.insert(tk.END, self.empty_text)
+            self.scrollbar.set(0, 1)
+            return
+
+        for index, row in enumerate(self._visible()):
+            self.listbox.insert(tk.END, self.format_row(row))
+            if row[self.id_field] in self._selected:
+                self.listbox.selection_set(index)
+        self.scrollbar.set(self.top / self.total, min(1.0, (self.top + self.height) / self.total))
+
+    def _on_select(self, event=None):
+        selected = set(self.listbox.curselection())
+        for index, row in enumerate(self._visible()):
+            if index in selected:
+                self._selected[row[self.id_field]] = row
+            else:
+                self._selected.pop(row[self.id_field], None)
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * self.total))
+        elif unit == "pages":
+            self.scroll(int(amount) * self.height)
+        else:
+            self.scroll(int(amount))
+
+    def _step(self, delta):
+        """Arrow keys: scroll the window when the active row is at its edge."""
+        active = self.listbox.index(tk.ACTIVE)
+        if 0 <= active + delta < self.listbox.size():
+            return None
+        self.scroll(delta)
+        return "break"